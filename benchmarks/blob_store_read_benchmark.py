@@ -0,0 +1,66 @@
+"""Read throughput of the GridFS and local content-addressed blob stores.
+
+    python benchmarks/blob_store_read_benchmark.py --blobs 200 --size 150000 \
+        --db_host localhost --db_port 27017 --db_name cats_bench
+
+GridFS is skipped when no MongoDB connection parameters are given. The GridFS
+benchmark writes into ``fs.files``/``fs.chunks`` of the given database and
+removes its files afterwards, so point it at a scratch database.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from bson import ObjectId  # noqa: E402
+from storage import GridFSBlobStore, LocalBlobStore  # noqa: E402
+
+
+def run(name, store, payloads, reads):
+    ids = []
+    for data in payloads:
+        blob_id = ObjectId()
+        store.put(blob_id, data, f"{blob_id}.jpg", 0)
+        ids.append(blob_id)
+
+    total_bytes = 0
+    start = time.perf_counter()
+    for i in range(reads):
+        total_bytes += len(store.get(ids[i % len(ids)]))
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:>8}: {reads / elapsed:10.0f} reads/s  {total_bytes / elapsed / 2**20:8.1f} MiB/s  "
+          f"{elapsed / reads * 1e6:8.1f} us/read")
+    return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare blob store read throughput.')
+    parser.add_argument('--blobs', type=int, default=200, help='Number of distinct photos')
+    parser.add_argument('--size', type=int, default=150_000, help='Photo size in bytes')
+    parser.add_argument('--reads', type=int, default=5000, help='Number of reads per store')
+    parser.add_argument('--db_host', type=str, help='MongoDB host for the GridFS run')
+    parser.add_argument('--db_port', type=int, default=27017, help='MongoDB port')
+    parser.add_argument('--db_name', type=str, default='cat_contest_benchmark', help='Scratch MongoDB database')
+    args = parser.parse_args()
+
+    payloads = [os.urandom(args.size) for _ in range(args.blobs)]
+
+    with tempfile.TemporaryDirectory() as root:
+        run("local", LocalBlobStore(root), payloads, args.reads)
+
+    if args.db_host is None:
+        print(" gridfs: skipped (no --db_host)")
+        return
+    from pymongo import MongoClient
+    store = GridFSBlobStore(MongoClient(args.db_host, args.db_port)[args.db_name])
+    ids = run("gridfs", store, payloads, args.reads)
+    for blob_id in ids:
+        store.delete(blob_id)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,352 @@
+"""End-to-end load test of one CatContest instance.
+
+Thousands of simulated users go through /start, vote on the pairs the bot
+offers them, and some upload a photo. Telegram is replaced by a fake bot that
+records every call and sleeps for a configurable latency, and Rekognition by a
+local stub client behind the real AmazonRekognitionModerationService.
+
+    python benchmarks/load_test.py --users 2000 --votes_per_user 5 --concurrency 200
+    python benchmarks/load_test.py --backend mongo --db_host localhost --db_port 27017 --db_name cats_load
+
+The mongo backend writes into the given database, so point it at a scratch one.
+Reports votes/sec, p50/p95/p99 latency per handler, and database calls per vote
+(interface calls for every backend, plus MongoDB commands for the mongo backend).
+Per-vote figures only count calls made while process_vote runs; totals for all
+traffic, including /start, results and uploads, are reported separately.
+"""
+import argparse
+import asyncio
+import contextvars
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from functools import wraps
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from PIL import Image  # noqa: E402
+from cat_contest import CatContest  # noqa: E402
+from db import CatVotingDatabaseInterface, InMemoryCatVotingDatabase  # noqa: E402
+from moderation import AmazonRekognitionModerationService  # noqa: E402
+
+TIMED_HANDLERS = ("start", "button", "vote", "process_vote", "show_results", "photo_handler")
+
+# Set while process_vote runs, so database calls can be attributed to votes
+in_vote = contextvars.ContextVar("in_vote", default=False)
+
+
+class FakeBot:
+    """Stands in for telegram.Bot: records calls and simulates network latency."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = Counter()
+        self.last_markup = {}
+
+    async def _call(self, name):
+        self.calls[name] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def send_media_group(self, chat_id, media):
+        await self._call("send_media_group")
+
+    async def send_message(self, chat_id, text, reply_markup=None):
+        if reply_markup is not None:
+            self.last_markup[chat_id] = reply_markup
+        await self._call("send_message")
+
+    async def send_photo(self, chat_id, photo, caption=None):
+        await self._call("send_photo")
+
+
+class FakeRekognitionClient:
+    """Local replacement for the boto3 Rekognition client."""
+
+    def __init__(self, latency, cat_ratio):
+        self.latency = latency
+        self.cat_ratio = cat_ratio
+        self.calls = Counter()
+
+    def _call(self, name):
+        self.calls[name] += 1
+        if self.latency:
+            # boto3 is synchronous; like the real client this blocks the worker thread moderation runs in
+            time.sleep(self.latency)
+
+    def detect_moderation_labels(self, Image):
+        self._call("detect_moderation_labels")
+        return {'ModerationLabels': []}
+
+    def detect_labels(self, Image, MaxLabels, MinConfidence):
+        self._call("detect_labels")
+        if random.random() < self.cat_ratio:
+            return {'Labels': [{'Name': 'Cat', 'Confidence': 99}]}
+        return {'Labels': [{'Name': 'Dog', 'Confidence': 99}]}
+
+
+class FakeFile:
+    def __init__(self, file_id, payload):
+        self.file_id = file_id
+        self.payload = payload
+
+    async def download_to_drive(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.payload)
+
+
+class CountingDatabase(CatVotingDatabaseInterface):
+    """Delegates to a real database and counts interface calls, in total and inside votes."""
+
+    def __init__(self, database):
+        self.database = database
+        self.calls = Counter()
+        self.vote_calls = Counter()
+
+    def _delegate(self, name, *args):
+        self.calls[name] += 1
+        if in_vote.get():
+            self.vote_calls[name] += 1
+        return getattr(self.database, name)(*args)
+
+    def get_rating(self, cat_id):
+        return self._delegate("get_rating", cat_id)
+
+    def add_user(self, user):
+        return self._delegate("add_user", user)
+
+    def get_cats_for_voting(self):
+        return self._delegate("get_cats_for_voting")
+
+    def get_top_cats(self, limit):
+        return self._delegate("get_top_cats", limit)
+
+    def get_user_photos_with_votes(self, user_id):
+        return self._delegate("get_user_photos_with_votes", user_id)
+
+    def update_ratings(self, winner_id, loser_id):
+        return self._delegate("update_ratings", winner_id, loser_id)
+
+    def update_winner(self, winner_id, new_winner_rating):
+        return self._delegate("update_winner", winner_id, new_winner_rating)
+
+    def update_loser(self, loser_id, new_loser_rating):
+        return self._delegate("update_loser", loser_id, new_loser_rating)
+
+    def insert_declined_photo(self, image_id, sanitized_filename, user_id, message):
+        return self._delegate("insert_declined_photo", image_id, sanitized_filename, user_id, message)
+
+    def insert_accepted_photo(self, image_id, sanitized_filename, user_id):
+        return self._delegate("insert_accepted_photo", image_id, sanitized_filename, user_id)
+
+    def save_photo(self, image_file, filename, user_id):
+        return self._delegate("save_photo", image_file, filename, user_id)
+
+    def get_photo(self, photo_id):
+        return self._delegate("get_photo", photo_id)
+
+
+class LoadHarness:
+    def __init__(self, database, args):
+        self.args = args
+        self.bot = FakeBot(args.bot_latency_ms / 1000)
+        self.rekognition = FakeRekognitionClient(args.rekognition_latency_ms / 1000, args.cat_ratio)
+        moderation_service = AmazonRekognitionModerationService('load-test', 'load-test', 'us-east-1')
+        moderation_service.client = self.rekognition
+        self.database = CountingDatabase(database)
+        self.contest = CatContest('load-test-token', None, None, None, database=self.database,
+                                  moderation_service=moderation_service)
+        self.latencies = defaultdict(list)
+        self._instrument()
+        self.photo_payload = make_jpeg(1024, 768)
+
+    def _instrument(self):
+        for name in TIMED_HANDLERS:
+            handler = getattr(self.contest, name)
+            setattr(self.contest, name, self._timed(name, handler))
+
+    def _timed(self, name, handler):
+        @wraps(handler)
+        async def wrapper(*args, **kwargs):
+            token = in_vote.set(True) if name == "process_vote" else None
+            start = time.perf_counter()
+            try:
+                return await handler(*args, **kwargs)
+            finally:
+                self.latencies[name].append(time.perf_counter() - start)
+                if token is not None:
+                    in_vote.reset(token)
+        return wrapper
+
+    def seed(self, cats):
+        for i in range(cats):
+            image_id = self.database.database.save_photo(io.BytesIO(make_jpeg(320, 240, seed=i)), f"seed{i}", 0)
+            self.database.database.insert_accepted_photo(image_id, f"seed{i}", 0)
+
+    def _user(self, user_id):
+        lang = "ru" if user_id % 4 == 0 else "en"
+        return SimpleNamespace(id=user_id, first_name="Load", last_name=str(user_id),
+                               username=f"load{user_id}", language_code=lang)
+
+    def _message_update(self, user, photo=None):
+        async def reply_text(text, reply_markup=None):
+            if reply_markup is not None:
+                self.bot.last_markup[user.id] = reply_markup
+            await self.bot._call("reply_text")
+
+        message = SimpleNamespace(from_user=user, reply_text=reply_text, photo=photo)
+        return SimpleNamespace(message=message, callback_query=None,
+                               effective_chat=SimpleNamespace(id=user.id), effective_user=user)
+
+    def _callback_update(self, user, data):
+        async def answer():
+            await self.bot._call("answer_callback_query")
+
+        async def edit_message_text(text):
+            await self.bot._call("edit_message_text")
+
+        update = self._message_update(user)
+        update.callback_query = SimpleNamespace(data=data, from_user=user, message=update.message,
+                                                answer=answer, edit_message_text=edit_message_text)
+        return update
+
+    def _photo_update(self, user):
+        async def get_file():
+            return FakeFile(f"file{user.id}", self.photo_payload)
+
+        return self._message_update(user, photo=[SimpleNamespace(get_file=get_file)])
+
+    async def simulate_user(self, user_id):
+        user = self._user(user_id)
+        context = SimpleNamespace(bot=self.bot, user_data={})
+        await self.contest.start(self._message_update(user), context)
+        for _ in range(self.args.votes_per_user):
+            markup = self.bot.last_markup.get(user.id)
+            # Without a pair to vote on the bot shows a single-button keyboard instead
+            if markup is None or not markup.inline_keyboard[0][0].callback_data.startswith('vote_'):
+                break
+            choice = markup.inline_keyboard[0][random.randrange(2)]
+            await self.contest.button(self._callback_update(user, choice.callback_data), context)
+        if random.random() < self.args.results_ratio:
+            await self.contest.button(self._callback_update(user, 'show_results'), context)
+        if random.random() < self.args.upload_ratio:
+            await self.contest.button(self._callback_update(user, 'add_photo'), context)
+            await self.contest.photo_handler(self._photo_update(user), context)
+
+    async def run(self):
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+
+        async def limited(user_id):
+            async with semaphore:
+                await self.simulate_user(user_id)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(limited(1_000_000 + i) for i in range(self.args.users)))
+        return time.perf_counter() - start
+
+
+def make_jpeg(width, height, seed=0):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), ((seed * 37) % 256, (seed * 91) % 256, 128)).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))]
+
+
+def report(harness, elapsed, mongo_commands, mongo_vote_commands):
+    votes = len(harness.latencies["process_vote"])
+    print(f"users: {harness.args.users}  votes: {votes}  wall time: {elapsed:.2f}s  "
+          f"votes/sec: {votes / elapsed:.0f}")
+    print(f"{'handler':>14} {'calls':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name in TIMED_HANDLERS:
+        values = sorted(harness.latencies[name])
+        if values:
+            print(f"{name:>14} {len(values):>8} {percentile(values, 50) * 1000:9.2f} "
+                  f"{percentile(values, 95) * 1000:9.2f} {percentile(values, 99) * 1000:9.2f}")
+    if votes:
+        print(f"db interface calls per vote: {sum(harness.database.vote_calls.values()) / votes:.2f} "
+              f"{dict(harness.database.vote_calls)}")
+        if mongo_vote_commands is not None:
+            print(f"mongo commands per vote: {sum(mongo_vote_commands.values()) / votes:.2f} "
+                  f"{dict(mongo_vote_commands)}")
+    print(f"db calls, all traffic: {sum(harness.database.calls.values())} {dict(harness.database.calls)}")
+    if mongo_commands is not None:
+        print(f"mongo commands, all traffic: {sum(mongo_commands.values())} {dict(mongo_commands)}")
+    print(f"bot calls: {dict(harness.bot.calls)}")
+    print(f"rekognition calls: {dict(harness.rekognition.calls)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test a CatContest instance with simulated users.')
+    parser.add_argument('--users', type=int, default=2000, help='Number of simulated users')
+    parser.add_argument('--votes_per_user', type=int, default=5, help='Votes cast by each user')
+    parser.add_argument('--concurrency', type=int, default=200, help='Users active at the same time')
+    parser.add_argument('--cats', type=int, default=50, help='Cats seeded before the run')
+    parser.add_argument('--upload_ratio', type=float, default=0.05, help='Share of users uploading a photo')
+    parser.add_argument('--results_ratio', type=float, default=0.2, help='Share of users opening the results')
+    parser.add_argument('--cat_ratio', type=float, default=0.8, help='Share of uploads the stub accepts as cats')
+    parser.add_argument('--bot_latency_ms', type=float, default=5, help='Simulated Telegram API latency')
+    parser.add_argument('--rekognition_latency_ms', type=float, default=50, help='Simulated Rekognition latency')
+    parser.add_argument('--backend', type=str, choices=['memory', 'mongo'], default='memory', help='Storage backend')
+    parser.add_argument('--db_host', type=str, default='localhost', help='MongoDB host')
+    parser.add_argument('--db_port', type=int, default=27017, help='MongoDB port')
+    parser.add_argument('--db_name', type=str, default='cat_contest_load_test', help='Scratch MongoDB database')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    args = parser.parse_args()
+    if args.cats < 2:
+        parser.error('--cats must be at least 2, voting needs a pair of cats')
+
+    random.seed(args.seed)
+    mongo_commands = mongo_vote_commands = None
+    if args.backend == 'mongo':
+        from pymongo import monitoring
+        from db import MongoCatVotingDatabase
+
+        mongo_commands = Counter()
+        mongo_vote_commands = Counter()
+
+        class CommandCounter(monitoring.CommandListener):
+            # Listeners run synchronously in the calling context, so in_vote is visible here
+            def started(self, event):
+                mongo_commands[event.command_name] += 1
+                if in_vote.get():
+                    mongo_vote_commands[event.command_name] += 1
+
+            def succeeded(self, event):
+                pass
+
+            def failed(self, event):
+                pass
+
+        monitoring.register(CommandCounter())
+        database = MongoCatVotingDatabase(args.db_host, args.db_port, args.db_name)
+    else:
+        database = InMemoryCatVotingDatabase()
+
+    harness = LoadHarness(database, args)
+    harness.seed(args.cats)
+    if mongo_commands is not None:
+        mongo_commands.clear()
+
+    # photo_handler downloads and resizes into the working directory
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.chdir(work_dir)
+        try:
+            elapsed = asyncio.run(harness.run())
+        finally:
+            os.chdir(cwd)
+    report(harness, elapsed, mongo_commands, mongo_vote_commands)
+
+
+if __name__ == '__main__':
+    main()
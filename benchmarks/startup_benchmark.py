@@ -0,0 +1,60 @@
+"""Cold-start time of a bot worker.
+
+Each run starts a fresh interpreter, imports ``main`` and then does what
+``main()`` does before polling: the remaining imports, building the database,
+the CatContest and the telegram Application, without talking to Telegram. Nothing needs to be
+listening on the MongoDB address: clients should not connect during startup.
+
+    python benchmarks/startup_benchmark.py --runs 10 --backend mongo
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from cat_contest import CatContest
+from telegram.ext import ApplicationBuilder
+import metrics, profiling
+if sys.argv[1] == 'mongo':
+    from db import MongoCatVotingDatabase
+    database = MongoCatVotingDatabase('127.0.0.1', 1, 'startup_benchmark')
+else:
+    from db import InMemoryCatVotingDatabase
+    database = InMemoryCatVotingDatabase()
+contest = CatContest('token', 'key', 'secret', 'us-east-1', database=database)
+ApplicationBuilder().token('123:benchmark').build()
+built = time.perf_counter()
+print(imported - start, built - imported)
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure bot cold-start time.')
+    parser.add_argument('--runs', type=int, default=10, help='Fresh interpreters to start')
+    parser.add_argument('--backend', type=str, choices=['memory', 'mongo'], default='mongo', help='Storage backend')
+    args = parser.parse_args()
+
+    imports, builds = [], []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, '-c', SNIPPET, args.backend], cwd=SRC_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        import_time, build_time = map(float, output.split())
+        imports.append(import_time)
+        builds.append(build_time)
+
+    print(f"backend: {args.backend}, runs: {args.runs}")
+    print(f"import main:        median {statistics.median(imports) * 1000:7.1f} ms")
+    print(f"main() to polling:  median {statistics.median(builds) * 1000:7.1f} ms")
+    print(f"total:              median {statistics.median(map(sum, zip(imports, builds))) * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Allocations made by the text and keyboard work of a single vote.
+
+Runs what CatContest does per vote besides I/O: the winner label and thanks
+message, the next pair's keyboard and the vote prompt. For each vote it reports
+the peak of transient allocations (tracemalloc), the memory blocks still alive
+afterwards, and the wall time.
+
+    python benchmarks/vote_allocation_benchmark.py --votes 20000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from cat_contest import CatContest  # noqa: E402
+from db import InMemoryCatVotingDatabase  # noqa: E402
+
+
+def vote_path(contest, cats, lang):
+    winner = contest.get_text(lang, "vote_cat_1")
+    thanks = contest.get_text(lang, "thanks_voting", winner=winner)
+    reply_markup = contest.create_keyboard(cats, lang)
+    prompt = contest.get_text(lang, "vote_prompt")
+    return thanks, reply_markup, prompt
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure per-vote allocations of texts and keyboards.')
+    parser.add_argument('--votes', type=int, default=20000, help='Votes to simulate')
+    args = parser.parse_args()
+
+    contest = CatContest('benchmark-token', None, None, None, database=InMemoryCatVotingDatabase(),
+                         moderation_service=object())
+    cats = [{"_id": "65f0c0ffee0000000000000%d" % i} for i in range(2)]
+    langs = ["en", "ru", "de", None]
+
+    for i in range(1000):
+        vote_path(contest, cats, langs[i % len(langs)])
+
+    start = time.perf_counter()
+    for i in range(args.votes):
+        vote_path(contest, cats, langs[i % len(langs)])
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    peaks = []
+    kept = []
+    before = tracemalloc.take_snapshot()
+    for i in range(args.votes):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        kept.append(vote_path(contest, cats, langs[i % len(langs)]))
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    # Leave out the bookkeeping lists of this script
+    own = (tracemalloc.Filter(False, __file__),)
+    diff = after.filter_traces(own).compare_to(before.filter_traces(own), "filename")
+    blocks = sum(stat.count_diff for stat in diff if stat.count_diff > 0)
+
+    print(f"votes: {args.votes}")
+    print(f"time per vote:           {elapsed / args.votes * 1e6:8.2f} us")
+    print(f"transient peak per vote: {statistics.mean(peaks):8.0f} bytes (median {statistics.median(peaks):.0f})")
+    print(f"live blocks per vote:    {blocks / args.votes:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,21 @@
 from .cat_contest import CatContest
-from .db import CatVotingDatabaseInterface, MongoCatVotingDatabase
+from .db import CatVotingDatabaseInterface, MongoCatVotingDatabase, InMemoryCatVotingDatabase
 from .moderation import AmazonRekognitionModerationService, ImageModerationService
+from .storage import BlobStore, GridFSBlobStore, LocalBlobStore, InMemoryBlobStore
+from .metrics import MetricsRegistry
 from .utils import calculate_new_ratings
 
 __all__ = [
     'CatContest',
     'CatVotingDatabaseInterface',
     'MongoCatVotingDatabase',
+    'InMemoryCatVotingDatabase',
     'AmazonRekognitionModerationService',
     'ImageModerationService',
+    'BlobStore',
+    'GridFSBlobStore',
+    'LocalBlobStore',
+    'InMemoryBlobStore',
+    'MetricsRegistry',
     'calculate_new_ratings'
 ]
\ No newline at end of file
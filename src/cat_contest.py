@@ -1,60 +1,67 @@
+import asyncio
 import logging
 import os
+import time
 
 import re
 from telegram import InlineKeyboardButton, InputMediaPhoto, Update, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
-from PIL import Image
 from typing import List
-from moderation import AmazonRekognitionModerationService
-from db import MongoCatVotingDatabase
+from moderation import AmazonRekognitionModerationService, ImageModerationService
+from db import CatVotingDatabaseInterface
+from localization import LocalizationCatalog
 
+# Button rows of the static keyboards; each button's text key is also its callback data
+KEYBOARD_LAYOUTS = {
+    "vote": ("show_results", "display_users_photos", "add_photo"),
+    "next_action": ("continue_voting", "add_photo", "show_results"),
+    "next_action_after_results": ("continue_voting", "add_photo", "display_users_photos"),
+    "not_enough_pictures": ("add_photo",)
+}
 
 
 class CatContest:
 # Elo rating constants
 
-    def __init__(self, token, aws_access_key, aws_secret_key, aws_region, db_host, db_port, db_name):
+    def __init__(self, token, aws_access_key, aws_secret_key, aws_region, db_host=None, db_port=None, db_name=None, database: CatVotingDatabaseInterface = None, moderation_service: ImageModerationService = None, catalog: LocalizationCatalog = None):
         self.token = token
-        self.moderation_service = AmazonRekognitionModerationService(aws_access_key, aws_secret_key, aws_region)
-        self.db = MongoCatVotingDatabase(db_host, db_port, db_name)
+        self.moderation_service = moderation_service if moderation_service is not None else AmazonRekognitionModerationService(aws_access_key, aws_secret_key, aws_region)
+        if database is None:
+            from db import MongoCatVotingDatabase
+            database = MongoCatVotingDatabase(db_host, db_port, db_name)
+        self.db = database
         self.user_state = {}
+        self.catalog = catalog if catalog is not None else LocalizationCatalog()
+        self._markups = {}
         
     def get_text(self, lang_code, key, **kwargs):
-        texts = {
-            "en": {
-                "vote_cat_1": "Cat on the left",
-                "vote_cat_2": "Cat on the right",
-                "show_results": "Show Results",
-                "continue_voting": "Continue voting",
-                "vote_prompt": "Choose the cat you like the most:",
-                "next_action_prompt": "What would you like to do next?",
-                "thanks_voting": "Thanks for voting! You voted for {winner}.",
-                "add_photo": "Add my cat photo",
-                "send_photo_prompt": "Please send me the photo of your cat.",
-                "photo_added": "Your photo has been added to the contest!",
-                "photo_declined": "Your photo cannot be added. Reason: {message}",
-                "display_users_photos": "Display my photos"
-            },
-            "ru": {
-                "vote_cat_1": "Кот слева",
-                "vote_cat_2": "Кот справа",
-                "show_results": "Показать результаты",
-                "continue_voting": "Продолжить голосование",
-                "vote_prompt": "Выбирете кота который вам больше нравится:",
-                "next_action_prompt": "Что бы вы хотели сделать дальше?",
-                "thanks_voting": "Спасибо за голосование! Вы проголосовали за {winner}.",
-                "add_photo": "Добавить фото моего кота",
-                "send_photo_prompt": "Пожалуйста, пришлите мне фото вашего кота.",
-                "photo_added": "Фото вашего кота добавлено!",
-                "photo_declined": "Ваше фото не может быть добавлено. Причина: {message}",
-                "display_users_photos": "Показать мои фото"
-            }
-        }
-        text = texts.get(lang_code, texts["en"]).get(key, key)
-        return text.format(**kwargs)
+        return self.catalog.get(lang_code, key, **kwargs)
+
+    def cached_markup(self, lang_code, layout):
+        key = (lang_code, layout)
+        markup = self._markups.get(key)
+        if markup is None:
+            rows = [[InlineKeyboardButton(self.get_text(lang_code, action), callback_data=action)] for action in KEYBOARD_LAYOUTS[layout]]
+            markup = self._markups[key] = InlineKeyboardMarkup(rows)
+        return markup
+
+    def warm_up(self):
+        """Prime clients and caches off the hot path; safe to run in a background thread."""
+        start = time.perf_counter()
+        for lang_code in self.catalog.languages:
+            for layout in KEYBOARD_LAYOUTS:
+                self.cached_markup(lang_code, layout)
+        self.db.warm_up()
+        try:
+            if hasattr(self.moderation_service, "warm_up"):
+                self.moderation_service.warm_up()
+        except Exception as e:
+            logging.error(f"Error warming up moderation service: {str(e)}")
+        import PIL.Image  # noqa: F401  (deferred from import time, first upload would pay for it)
+        logging.info("Warm-up finished in %.2fs", time.perf_counter() - start)
 
     def preprocess_image(self, image_path, output_size=(800, 600)):
+        from PIL import Image
         with Image.open(image_path) as img:
             # Resize the image to the desired size, maintaining aspect ratio
             img.thumbnail(output_size, Image.Resampling.LANCZOS)  # Updated to use Image.Resampling.LANCZOS
@@ -81,27 +88,23 @@ class CatContest:
     async def vote(self, update: Update, context: ContextTypes.DEFAULT_TYPE, lang_code: str = "en") -> None:
         selected_cats = self.db.get_cats_for_voting()
         if len(selected_cats) < 2:
-            await self.send_not_enough_pictures_message(self, update, lang_code)
+            await self.send_not_enough_pictures_message(update, lang_code)
             return
-        media_group = [InputMediaPhoto(self.db.fs.get(cat["_id"]).read(), caption=f"Cat {i+1}") for i, cat in enumerate(selected_cats)]
+        media_group = [InputMediaPhoto(self.db.get_photo(cat["_id"]), caption=f"Cat {i+1}") for i, cat in enumerate(selected_cats)]
         reply_markup = self.create_keyboard(selected_cats, lang_code)
         await self.send_media_and_message(context, update.effective_chat.id, media_group, lang_code, reply_markup)
 
     async def send_not_enough_pictures_message(self, update: Update, lang_code: str) -> None:
-        keyboard = [[InlineKeyboardButton(self.get_text(lang_code, "add_photo"), callback_data='add_photo')]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = self.cached_markup(lang_code, "not_enough_pictures")
         await update.message.reply_text(self.get_text(lang_code, "not_enough_pictures"), reply_markup=reply_markup)
 
     def create_keyboard(self, cats: List[dict], lang_code: str) -> InlineKeyboardMarkup:
         cat1, cat2 = cats
-        keyboard = [
-            [InlineKeyboardButton(self.get_text(lang_code, "vote_cat_1"), callback_data=f'vote_{cat1["_id"]}_{cat2["_id"]}_1'),
-            InlineKeyboardButton(self.get_text(lang_code, "vote_cat_2"), callback_data=f'vote_{cat1["_id"]}_{cat2["_id"]}_2')],
-            [InlineKeyboardButton(self.get_text(lang_code, "show_results"), callback_data='show_results')],
-            [InlineKeyboardButton(self.get_text(lang_code, "display_users_photos"), callback_data='display_users_photos')],
-            [InlineKeyboardButton(self.get_text(lang_code, "add_photo"), callback_data='add_photo')]
-        ]
-        return InlineKeyboardMarkup(keyboard)
+        # Only the vote buttons depend on the pair; the rows below them are shared
+        pair = f'vote_{cat1["_id"]}_{cat2["_id"]}_'
+        vote_row = (InlineKeyboardButton(self.get_text(lang_code, "vote_cat_1"), callback_data=pair + '1'),
+                    InlineKeyboardButton(self.get_text(lang_code, "vote_cat_2"), callback_data=pair + '2'))
+        return InlineKeyboardMarkup((vote_row,) + self.cached_markup(lang_code, "vote").inline_keyboard)
 
     async def send_media_and_message(self, context: ContextTypes.DEFAULT_TYPE, chat_id: int, media_group: List[InputMediaPhoto], lang_code: str, reply_markup: InlineKeyboardMarkup) -> None:
         await context.bot.send_media_group(chat_id=chat_id, media=media_group)
@@ -140,17 +143,17 @@ class CatContest:
         if winner_index == '1':
             self.db.update_ratings(cat1_id, cat2_id)
             winner = self.get_text(user_lang, "vote_cat_1")
-            logging.info(f"User {query.from_user.id} voted for cat {cat1_id}")
+            logging.info("User %s voted for cat %s", query.from_user.id, cat1_id)
         else:
             self.db.update_ratings(cat2_id, cat1_id)
             winner = self.get_text(user_lang, "vote_cat_2")
-            logging.info(f"User {query.from_user.id} voted for cat {cat2_id}")
+            logging.info("User %s voted for cat %s", query.from_user.id, cat2_id)
 
         await query.edit_message_text(text=self.get_text(user_lang, "thanks_voting", winner=winner))
         await self.vote(update, context, user_lang)
 
     async def show_results(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        top_cats = list(self.db.cat_collection.find().sort("rating", -1).limit(3))
+        top_cats = self.db.get_top_cats(3)
 
         if not top_cats:
             await update.callback_query.message.reply_text("No votes yet.")
@@ -158,7 +161,7 @@ class CatContest:
 
         places = ["1st Place", "2nd Place", "3rd Place"]
         for idx, cat in enumerate(top_cats):
-            cat_image_path = self.db.fs.get(cat["_id"]).read()
+            cat_image_path = self.db.get_photo(cat["_id"])
             wins = cat.get("wins", 0)
             losses = cat.get("losses", 0)
             await context.bot.send_photo(
@@ -182,7 +185,7 @@ class CatContest:
 
         user_photos = self.db.get_user_photos_with_votes(user_id)
         for idx, cat in enumerate(user_photos):  # Unpack the tuple here
-            cat_image_path = self.db.fs.get(cat["photo_id"]).read()
+            cat_image_path = self.db.get_photo(cat["photo_id"])
             wins = cat.get("wins", 0)
             losses = cat.get("losses", 0)
             rank = cat.get("rank", 0)
@@ -198,17 +201,10 @@ class CatContest:
     async def send_next_action_prompt(self, update: Update, context: ContextTypes.DEFAULT_TYPE, user_lang) -> None:
         user_id = update.effective_user.id
         previous_action = self.user_state[user_id]
-        keyboard = [
-            [InlineKeyboardButton(self.get_text(user_lang, "continue_voting"), callback_data='continue_voting')],
-            [InlineKeyboardButton(self.get_text(user_lang, "add_photo"), callback_data='add_photo')]
-        ]
         if previous_action == "show_results":
-            keyboard+=  [[InlineKeyboardButton(self.get_text(user_lang, "display_users_photos"), callback_data='display_users_photos')]]
+            reply_markup = self.cached_markup(user_lang, "next_action_after_results")
         else:
-            keyboard+= [[InlineKeyboardButton(self.get_text(user_lang, "show_results"), callback_data='show_results')]]
-
-
-        reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = self.cached_markup(user_lang, "next_action")
         await context.bot.send_message(chat_id=update.effective_chat.id, text=self.get_text(user_lang, "next_action_prompt"), reply_markup=reply_markup)
 
     async def photo_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -219,7 +215,9 @@ class CatContest:
                 user_lang = update.message.from_user.language_code
                 
                 sanitized_filename, processed_image_path = await self.prepare_photo(photo_file, update.message.from_user.id)
-                is_appropriate, message = self.moderation_service.moderate_image(processed_image_path)
+                # Moderation blocks on network calls, so it runs in a worker thread (run_in_executor keeps 3.8 support)
+                is_appropriate, message = await asyncio.get_running_loop().run_in_executor(
+                    None, self.moderation_service.moderate_image, processed_image_path)
                 
                 if not is_appropriate:
                     await self.insert_declined_photo_db(update, sanitized_filename, processed_image_path, message)
@@ -251,10 +249,10 @@ class CatContest:
 
     async def insert_declined_photo_db(self, update, sanitized_filename, processed_image_path, message):
         with open(processed_image_path, 'rb') as f:
-            image_id = self.db.fs.put(f, filename=sanitized_filename, user_id=update.message.from_user.id)
+            image_id = self.db.save_photo(f, sanitized_filename, update.message.from_user.id)
         self.db.insert_declined_photo(image_id, sanitized_filename, update.message.from_user.id, message)
 
     async def insert_accepted_photo_db(self, update, sanitized_filename, processed_image_path):
         with open(processed_image_path, 'rb') as f:
-            image_id = self.db.fs.put(f, filename=sanitized_filename, user_id=update.message.from_user.id)
+            image_id = self.db.save_photo(f, sanitized_filename, update.message.from_user.id)
         self.db.insert_accepted_photo(image_id, sanitized_filename, update.message.from_user.id)
\ No newline at end of file
@@ -1,4 +1,7 @@
+from utils import lazy_exports
 from .database_interface import CatVotingDatabaseInterface
-from .mongo_database import MongoCatVotingDatabase
+from .memory_database import InMemoryCatVotingDatabase
 
-__all__ = ['CatVotingDatabaseInterface', 'MongoCatVotingDatabase']
\ No newline at end of file
+__all__ = ['CatVotingDatabaseInterface', 'MongoCatVotingDatabase', 'InMemoryCatVotingDatabase', 'MongoStorageReclaimer']
+
+__getattr__ = lazy_exports(__name__, {'MongoCatVotingDatabase': '.mongo_database', 'MongoStorageReclaimer': '.reclamation'})
\ No newline at end of file
@@ -14,6 +14,10 @@ class CatVotingDatabaseInterface(ABC):
     def get_cats_for_voting(self):
         pass
 
+    @abstractmethod
+    def get_top_cats(self, limit):
+        pass
+
     @abstractmethod
     def get_user_photos_with_votes(self, user_id):
         pass
@@ -36,4 +40,15 @@ class CatVotingDatabaseInterface(ABC):
 
     @abstractmethod
     def insert_accepted_photo(self, image_id, sanitized_filename, user_id):
+        pass
+
+    @abstractmethod
+    def save_photo(self, image_file, filename, user_id):
+        pass
+
+    @abstractmethod
+    def get_photo(self, photo_id):
+        pass
+
+    def warm_up(self):
         pass
\ No newline at end of file
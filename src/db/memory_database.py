@@ -0,0 +1,335 @@
+import heapq
+import json
+import logging
+import os
+import pickle
+import random
+import shutil
+import threading
+from array import array
+from db import CatVotingDatabaseInterface
+from storage import InMemoryBlobStore, LocalBlobStore
+from utils import calculate_new_ratings, DEFAULT_RATING
+
+SNAPSHOT_FILENAME = "snapshot.pickle"
+JOURNAL_FILENAME = "journal.log"
+ROTATED_JOURNAL_FILENAME = "journal.log.1"
+PHOTOS_DIRNAME = "photos"
+
+
+class InMemoryCatVotingDatabase(CatVotingDatabaseInterface):
+    """Voting database kept entirely in process memory.
+
+    Ratings, wins, losses and vote counts live in flat arrays indexed through
+    a dict keyed by cat id, so a vote is a couple of array writes. When
+    ``data_dir`` is given, every mutation is appended to a journal and the
+    whole state is snapshotted every ``snapshot_interval`` mutations. The
+    snapshot copies the state, switches to a fresh journal and pickles the
+    copy on a background thread; the previous journal is removed once the
+    snapshot is on disk. On start the snapshot is loaded and both journals
+    are replayed on top of it. User records are replaced rather than
+    mutated, so copying the state is a shallow copy of each container.
+    Without ``data_dir`` nothing touches the disk, which suits load tests.
+    Photos go to ``blob_store``, by default a local content-addressed store
+    under ``data_dir`` or a plain dict when running purely in memory.
+    """
+
+    def __init__(self, data_dir=None, snapshot_interval=1000, fsync=False, blob_store=None):
+        self.data_dir = data_dir
+        self.snapshot_interval = snapshot_interval
+        self.fsync = fsync
+
+        self.cat_ids = []
+        self.cat_index = {}
+        self.ratings = array('d')
+        self.wins = array('q')
+        self.losses = array('q')
+        self.total_votes = array('q')
+        self.cat_meta = []
+        self.declined = {}
+        self.users = {}
+
+        self._seq = 0
+        self._ops_since_snapshot = 0
+        self._journal = None
+        self._snapshot_thread = None
+
+        if blob_store is None:
+            blob_store = LocalBlobStore(os.path.join(data_dir, PHOTOS_DIRNAME)) if data_dir is not None else InMemoryBlobStore()
+        self.blob_store = blob_store
+
+        if data_dir is not None:
+            os.makedirs(data_dir, exist_ok=True)
+            if self._restore():
+                # Fold the replayed tail (and any torn entry) into a fresh snapshot
+                self.snapshot()
+            else:
+                self._journal = open(self._path(JOURNAL_FILENAME), 'a', encoding='utf-8')
+
+    def _path(self, name):
+        return os.path.join(self.data_dir, name)
+
+    def _new_id(self):
+        # 24 hex characters, same width as an ObjectId, so callback_data stays within Telegram's 64 bytes
+        return os.urandom(12).hex()
+
+    def _cat_doc(self, idx):
+        filename, user_id = self.cat_meta[idx]
+        return {
+            "_id": self.cat_ids[idx],
+            "filename": filename,
+            "user_id": user_id,
+            "rating": self.ratings[idx],
+            "wins": self.wins[idx],
+            "losses": self.losses[idx],
+            "total_votes": self.total_votes[idx]
+        }
+
+    def add_user(self, user):
+        user_info = {
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "username": user.username,
+            "language_code": user.language_code
+        }
+        self._record({"op": "add_user", "user_id": user.id, "info": user_info})
+        logging.info(f"User {user_info} added to database.")
+
+    def get_cats_for_voting(self):
+        if len(self.cat_ids) < 2:
+            logging.warning("Not enough cats for voting.")
+            return []
+        least_voted = heapq.nsmallest(10, range(len(self.cat_ids)), key=self.total_votes.__getitem__)
+        return [self._cat_doc(idx) for idx in random.sample(least_voted, 2)]
+
+    def get_top_cats(self, limit):
+        top = heapq.nlargest(limit, range(len(self.cat_ids)), key=self.ratings.__getitem__)
+        return [self._cat_doc(idx) for idx in top]
+
+    def get_user_photos_with_votes(self, user_id):
+        user = self.users.get(user_id)
+        if not user:
+            logging.debug(f"No accepted photos found for user ID: {user_id}")
+            return []
+        order = sorted(range(len(self.cat_ids)), key=self.ratings.__getitem__, reverse=True)
+        rankings = {idx: rank + 1 for rank, idx in enumerate(order)}
+        photos_details = []
+        for photo_id in user["accepted_photos"]:
+            idx = self.cat_index.get(photo_id)
+            if idx is not None:
+                photos_details.append({
+                    "photo_id": photo_id,
+                    "wins": self.wins[idx],
+                    "losses": self.losses[idx],
+                    "rank": rankings[idx]
+                })
+        return photos_details
+
+    def get_rating(self, cat_id):
+        idx = self.cat_index.get(cat_id)
+        if idx is None:
+            logging.warning(f"Rating not found for cat ID: {cat_id}, returning default rating.")
+            return DEFAULT_RATING
+        return self.ratings[idx]
+
+    def update_ratings(self, winner_id, loser_id):
+        winner_idx = self.cat_index.get(winner_id)
+        loser_idx = self.cat_index.get(loser_id)
+        if winner_idx is None or loser_idx is None:
+            logging.error(f"Cannot find cat entries for winner_id: {winner_id} or loser_id: {loser_id}")
+            return
+
+        new_winner_rating, new_loser_rating = calculate_new_ratings(self.ratings[winner_idx], self.ratings[loser_idx])
+
+        self.update_winner(winner_id, new_winner_rating)
+        self.update_loser(loser_id, new_loser_rating)
+
+    def update_winner(self, winner_id, new_winner_rating):
+        self._record({"op": "update_winner", "cat_id": winner_id, "rating": new_winner_rating})
+        logging.debug("Winner cat ID: %s updated with new rating: %s", winner_id, new_winner_rating)
+
+    def update_loser(self, loser_id, new_loser_rating):
+        self._record({"op": "update_loser", "cat_id": loser_id, "rating": new_loser_rating})
+        logging.debug("Loser cat ID: %s updated with new rating: %s", loser_id, new_loser_rating)
+
+    def insert_declined_photo(self, image_id, sanitized_filename, user_id, message):
+        self._record({"op": "insert_declined", "image_id": image_id, "filename": sanitized_filename,
+                      "user_id": user_id, "reason": message})
+        logging.info(f"Declined photo ID: {image_id} inserted into database.")
+
+    def insert_accepted_photo(self, image_id, sanitized_filename, user_id):
+        if image_id in self.cat_index:
+            logging.error(f"Error inserting accepted photo ID: {image_id}: duplicate ID")
+            return
+        self._record({"op": "insert_accepted", "image_id": image_id, "filename": sanitized_filename,
+                      "user_id": user_id})
+        logging.info(f"Accepted photo ID: {image_id} inserted into database.")
+
+    def save_photo(self, image_file, filename, user_id):
+        return self.blob_store.put(self._new_id(), image_file, filename, user_id)
+
+    def get_photo(self, photo_id):
+        return self.blob_store.get(photo_id)
+
+    def _record(self, entry):
+        self._seq += 1
+        entry["seq"] = self._seq
+        self._apply(entry)
+        if self._journal is None:
+            return
+        self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        self._ops_since_snapshot += 1
+        if self._ops_since_snapshot >= self.snapshot_interval:
+            self.snapshot(background=True)
+
+    def _apply(self, entry):
+        op = entry["op"]
+        if op == "update_winner" or op == "update_loser":
+            idx = self.cat_index.get(entry["cat_id"])
+            if idx is None:
+                logging.error(f"Error updating cat ID: {entry['cat_id']}: not found")
+                return
+            self.ratings[idx] = entry["rating"]
+            if op == "update_winner":
+                self.wins[idx] += 1
+            else:
+                self.losses[idx] += 1
+            self.total_votes[idx] += 1
+        elif op == "add_user":
+            user = self.users.get(entry["user_id"], {"accepted_photos": (), "declined_photos": ()})
+            self.users[entry["user_id"]] = {**user, **entry["info"]}
+        elif op == "insert_accepted":
+            self.cat_index[entry["image_id"]] = len(self.cat_ids)
+            self.cat_ids.append(entry["image_id"])
+            self.cat_meta.append((entry["filename"], entry["user_id"]))
+            self.ratings.append(DEFAULT_RATING)
+            self.wins.append(0)
+            self.losses.append(0)
+            self.total_votes.append(0)
+            self._add_user_photo(entry["user_id"], "accepted_photos", entry["image_id"])
+        elif op == "insert_declined":
+            self.declined[entry["image_id"]] = {
+                "filename": entry["filename"],
+                "user_id": entry["user_id"],
+                "reason": entry["reason"]
+            }
+            self._add_user_photo(entry["user_id"], "declined_photos", entry["image_id"])
+        else:
+            logging.error(f"Unknown journal operation: {op}")
+
+    def _add_user_photo(self, user_id, key, image_id):
+        # Mirrors Mongo's $push on a missing user: the photo is only tracked if the user exists
+        user = self.users.get(user_id)
+        if user is not None:
+            self.users[user_id] = {**user, key: tuple(user[key]) + (image_id,)}
+
+    def snapshot(self, background=False):
+        if self.data_dir is None:
+            return
+        if self._snapshot_thread is not None:
+            if background and self._snapshot_thread.is_alive():
+                # The next mutation tries again once the running snapshot is done
+                return
+            self._snapshot_thread.join()
+            self._snapshot_thread = None
+        state = {
+            "seq": self._seq,
+            "cat_ids": list(self.cat_ids),
+            "ratings": self.ratings[:],
+            "wins": self.wins[:],
+            "losses": self.losses[:],
+            "total_votes": self.total_votes[:],
+            "cat_meta": list(self.cat_meta),
+            "declined": dict(self.declined),
+            "users": dict(self.users)
+        }
+        # Entries up to state["seq"] stay in the rotated journal until the snapshot is written
+        if self._journal is not None:
+            self._journal.close()
+        self._rotate_journal()
+        self._journal = open(self._path(JOURNAL_FILENAME), 'a', encoding='utf-8')
+        self._ops_since_snapshot = 0
+        if background:
+            self._snapshot_thread = threading.Thread(target=self._write_snapshot, args=(state,),
+                                                     name="memory-db-snapshot", daemon=True)
+            self._snapshot_thread.start()
+        else:
+            self._write_snapshot(state)
+
+    def _rotate_journal(self):
+        journal_path = self._path(JOURNAL_FILENAME)
+        rotated_path = self._path(ROTATED_JOURNAL_FILENAME)
+        if not os.path.exists(journal_path):
+            return
+        if os.path.exists(rotated_path):
+            # A previous snapshot did not finish; its entries are still needed ahead of these
+            with open(rotated_path, 'a', encoding='utf-8') as dst, open(journal_path, 'r', encoding='utf-8') as src:
+                shutil.copyfileobj(src, dst)
+            os.remove(journal_path)
+        else:
+            os.replace(journal_path, rotated_path)
+
+    def _write_snapshot(self, state):
+        tmp_path = self._path(SNAPSHOT_FILENAME + ".tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._path(SNAPSHOT_FILENAME))
+            if os.path.exists(self._path(ROTATED_JOURNAL_FILENAME)):
+                os.remove(self._path(ROTATED_JOURNAL_FILENAME))
+        except OSError as e:
+            logging.error(f"Error writing snapshot at sequence {state['seq']}: {e}")
+            return
+        logging.info(f"Snapshot written at sequence {state['seq']}.")
+
+    def _restore(self):
+        """Load the snapshot and replay both journals; returns True if the journal should be compacted."""
+        snapshot_path = self._path(SNAPSHOT_FILENAME)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, 'rb') as f:
+                state = pickle.load(f)
+            self._seq = state["seq"]
+            self.cat_ids = state["cat_ids"]
+            self.ratings = state["ratings"]
+            self.wins = state["wins"]
+            self.losses = state["losses"]
+            self.total_votes = state["total_votes"]
+            self.cat_meta = state["cat_meta"]
+            self.declined = state["declined"]
+            self.users = state["users"]
+            self.cat_index = {cat_id: idx for idx, cat_id in enumerate(self.cat_ids)}
+
+        replayed = 0
+        torn = False
+        for name in (ROTATED_JOURNAL_FILENAME, JOURNAL_FILENAME):
+            journal_path = self._path(name)
+            if not os.path.exists(journal_path):
+                continue
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn last line from a crash mid-write; everything before it is intact
+                        logging.warning("Skipping truncated journal entry.")
+                        torn = True
+                        break
+                    if entry["seq"] <= self._seq:
+                        continue
+                    self._apply(entry)
+                    self._seq = entry["seq"]
+                    replayed += 1
+        logging.info(f"Restored {len(self.cat_ids)} cats, replayed {replayed} journal entries.")
+        return replayed > 0 or torn
+
+    def close(self):
+        if self._journal is None:
+            return
+        self.snapshot()
+        self._journal.close()
+        self._journal = None
@@ -1,24 +1,44 @@
-import gridfs
 from pymongo import MongoClient, errors
 from bson import ObjectId
 import random
 import logging
 from db import CatVotingDatabaseInterface
+from storage import GridFSBlobStore
 from utils import calculate_new_ratings, DEFAULT_RATING
 
 class MongoCatVotingDatabase(CatVotingDatabaseInterface):
-    def __init__(self, host, port, db_name):
+    def __init__(self, host, port, db_name, blob_store=None, max_pool_size=100, min_pool_size=0,
+                 connect_timeout_ms=20000, server_selection_timeout_ms=30000, socket_timeout_ms=None):
         try:
-            self.client = MongoClient(host, port)
+            # connect=False defers connecting and server monitoring to the first operation
+            self.client = MongoClient(
+                host, port,
+                maxPoolSize=max_pool_size,
+                minPoolSize=min_pool_size,
+                connectTimeoutMS=connect_timeout_ms,
+                serverSelectionTimeoutMS=server_selection_timeout_ms,
+                socketTimeoutMS=socket_timeout_ms,
+                connect=False
+            )
             self.db = self.client[db_name]
             self.cat_collection = self.db['cat_pictures']
             self.declined_collection = self.db['declined_pictures']
             self.user_collection = self.db['user_info']
-            self.fs = gridfs.GridFS(self.db)
+            self.blob_store = blob_store if blob_store is not None else GridFSBlobStore(self.db)
         except errors.PyMongoError as e:
             logging.error(f"MongoDB connection error: {e}")
             raise
 
+    def warm_up(self):
+        try:
+            # Indexes behind get_cats_for_voting and the rankings; no-ops when they exist
+            self.cat_collection.create_index([("total_votes", 1)])
+            self.cat_collection.create_index([("rating", -1)])
+            self.get_top_cats(3)
+            logging.info("MongoDB indexes and connection pool warmed up.")
+        except errors.PyMongoError as e:
+            logging.error(f"Error warming up MongoDB: {e}")
+
     def add_user(self, user):
         try:
             user_info = {
@@ -48,6 +68,13 @@ class MongoCatVotingDatabase(CatVotingDatabaseInterface):
         except errors.PyMongoError as e:
             logging.error(f"Error fetching cats for voting: {e}")
             return []
+
+    def get_top_cats(self, limit):
+        try:
+            return list(self.cat_collection.find().sort("rating", -1).limit(limit))
+        except errors.PyMongoError as e:
+            logging.error(f"Error fetching top cats: {e}")
+            return []
     
     def get_user_photos_with_votes(self, user_id):
         try:
@@ -129,7 +156,7 @@ class MongoCatVotingDatabase(CatVotingDatabaseInterface):
                 {"_id": ObjectId(winner_id)},
                 {"$set": {"rating": new_winner_rating}, "$inc": {"wins": 1, "total_votes": 1}}
             )
-            logging.debug(f"Winner cat ID: {winner_id} updated with new rating: {new_winner_rating}")
+            logging.debug("Winner cat ID: %s updated with new rating: %s", winner_id, new_winner_rating)
         except errors.PyMongoError as e:
             logging.error(f"Error updating winner cat ID: {winner_id}: {e}")
 
@@ -139,7 +166,7 @@ class MongoCatVotingDatabase(CatVotingDatabaseInterface):
                 {"_id": ObjectId(loser_id)},
                 {"$set": {"rating": new_loser_rating}, "$inc": {"losses": 1, "total_votes": 1}}
             )
-            logging.debug(f"Loser cat ID: {loser_id} updated with new rating: {new_loser_rating}")
+            logging.debug("Loser cat ID: %s updated with new rating: %s", loser_id, new_loser_rating)
         except errors.PyMongoError as e:
             logging.error(f"Error updating loser cat ID: {loser_id}: {e}")
 
@@ -176,4 +203,18 @@ class MongoCatVotingDatabase(CatVotingDatabaseInterface):
             )
             logging.info(f"Accepted photo ID: {image_id} inserted into database.")
         except errors.PyMongoError as e:
-            logging.error(f"Error inserting accepted photo ID: {image_id}: {e}")
\ No newline at end of file
+            logging.error(f"Error inserting accepted photo ID: {image_id}: {e}")
+
+    def save_photo(self, image_file, filename, user_id):
+        try:
+            return self.blob_store.put(ObjectId(), image_file, filename, user_id)
+        except (errors.PyMongoError, OSError) as e:
+            logging.error(f"Error saving photo {filename}: {e}")
+            raise
+
+    def get_photo(self, photo_id):
+        try:
+            return self.blob_store.get(photo_id)
+        except (errors.PyMongoError, OSError) as e:
+            logging.error(f"Error reading photo ID: {photo_id}: {e}")
+            raise
\ No newline at end of file
@@ -0,0 +1,166 @@
+import argparse
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import errors
+
+
+class MongoStorageReclaimer:
+    """Frees photo storage that no longer serves the contest.
+
+    Two kinds of photo are reclaimed: declined photos older than the
+    retention period, and orphaned blobs that have neither a ``cat_pictures``
+    nor a ``declined_pictures`` document (left behind by failed inserts).
+    Blob ids are streamed from the blob store and checked against both
+    collections in batches. Deletes are rate limited and a pass ends early
+    once ``stop()`` is called. A dry run only reports what would be removed
+    and how many bytes that would free.
+    """
+
+    def __init__(self, database, declined_retention_days=30, orphan_grace_seconds=3600,
+                 batch_size=500, max_deletes_per_second=20):
+        self.database = database
+        self.blob_store = database.blob_store
+        self.declined_retention_days = declined_retention_days
+        self.orphan_grace_seconds = orphan_grace_seconds
+        self.batch_size = batch_size
+        self.max_deletes_per_second = max_deletes_per_second
+        self._next_delete_at = 0.0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def run_once(self, dry_run=False):
+        report = {"dry_run": dry_run, "expired_declined": 0, "orphans": 0, "deleted": 0, "failed": 0, "bytes": 0}
+        now = datetime.now(timezone.utc)
+        try:
+            self._reclaim_expired_declined(now, report, dry_run)
+            self._reclaim_orphans(now, report, dry_run)
+        except errors.PyMongoError as e:
+            logging.error(f"Error during storage reclamation: {e}")
+        if self._stop_event.is_set():
+            logging.info("Storage reclamation stopped before the pass finished.")
+        action = "would reclaim" if dry_run else "reclaimed"
+        logging.info(f"Storage reclamation {action} {report['bytes']} bytes: {report}")
+        return report
+
+    def _reclaim_expired_declined(self, now, report, dry_run):
+        if self.declined_retention_days is None:
+            return
+        # Photo ids are ObjectIds minted at upload time, so the id encodes the decline date
+        cutoff = ObjectId.from_datetime(now - timedelta(days=self.declined_retention_days))
+        cursor = self.database.declined_collection.find(
+            {"_id": {"$lt": cutoff}}, {"user_id": 1}, batch_size=self.batch_size)
+        for doc in cursor:
+            if self._stop_event.is_set():
+                return
+            report["expired_declined"] += 1
+            self._delete(doc["_id"], report, dry_run, declined_doc=doc)
+
+    def _reclaim_orphans(self, now, report, dry_run):
+        grace_cutoff = now - timedelta(seconds=self.orphan_grace_seconds)
+        batch = []
+        for blob_id, length in self.blob_store.iter_blobs(batch_size=self.batch_size):
+            if self._stop_event.is_set():
+                return
+            blob_id = _as_object_id(blob_id)
+            # Skip blobs whose upload may still be in flight
+            if isinstance(blob_id, ObjectId) and blob_id.generation_time > grace_cutoff:
+                continue
+            batch.append((blob_id, length))
+            if len(batch) >= self.batch_size:
+                self._reclaim_orphan_batch(batch, report, dry_run)
+                batch = []
+        if batch and not self._stop_event.is_set():
+            self._reclaim_orphan_batch(batch, report, dry_run)
+
+    def _reclaim_orphan_batch(self, batch, report, dry_run):
+        ids = [blob_id for blob_id, _ in batch]
+        referenced = set()
+        for collection in (self.database.cat_collection, self.database.declined_collection):
+            referenced.update(doc["_id"] for doc in collection.find({"_id": {"$in": ids}}, {"_id": 1}))
+        for blob_id, length in batch:
+            if self._stop_event.is_set():
+                return
+            if blob_id not in referenced:
+                report["orphans"] += 1
+                self._delete(blob_id, report, dry_run, length=length)
+
+    def _delete(self, blob_id, report, dry_run, declined_doc=None, length=None):
+        if length is None:
+            length = self.blob_store.size(blob_id)
+        report["bytes"] += length
+        if dry_run:
+            return
+        self._throttle()
+        try:
+            self.blob_store.delete(blob_id)
+            if declined_doc is not None:
+                self.database.declined_collection.delete_one({"_id": blob_id})
+                self.database.user_collection.update_one(
+                    {"_id": declined_doc.get("user_id")},
+                    {"$pull": {"declined_photos": blob_id}}
+                )
+            report["deleted"] += 1
+            logging.debug(f"Reclaimed photo ID: {blob_id} ({length} bytes)")
+        except (errors.PyMongoError, OSError) as e:
+            logging.error(f"Error reclaiming photo ID: {blob_id}: {e}")
+            report["failed"] += 1
+
+    def _throttle(self):
+        if not self.max_deletes_per_second:
+            return
+        now = time.monotonic()
+        if now < self._next_delete_at:
+            self._stop_event.wait(self._next_delete_at - now)
+        self._next_delete_at = max(now, self._next_delete_at) + 1 / self.max_deletes_per_second
+
+    def start(self, interval_seconds, dry_run=False):
+        """Run reclamation every ``interval_seconds`` in a daemon thread."""
+        def loop():
+            while not self._stop_event.wait(interval_seconds):
+                self.run_once(dry_run)
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=loop, name="storage-reclaimer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def _as_object_id(blob_id):
+    # Local blob stores report ids as strings; Mongo documents are keyed by ObjectId
+    if isinstance(blob_id, str) and ObjectId.is_valid(blob_id):
+        return ObjectId(blob_id)
+    return blob_id
+
+
+def main():
+    from db import MongoCatVotingDatabase
+    from storage import LocalBlobStore
+
+    parser = argparse.ArgumentParser(description='Reclaim storage of expired declined photos and orphaned blobs.')
+    parser.add_argument('--db_host', type=str, required=True, help='MongoDB host')
+    parser.add_argument('--db_port', type=int, required=True, help='MongoDB port')
+    parser.add_argument('--db_name', type=str, required=True, help='MongoDB database name')
+    parser.add_argument('--blob_dir', type=str, help='Directory of the local blob store, if GridFS is not used')
+    parser.add_argument('--declined_retention_days', type=int, default=30, help='Days to keep declined photos')
+    parser.add_argument('--max_deletes_per_second', type=float, default=20, help='Delete rate limit')
+    parser.add_argument('--dry_run', action='store_true', help='Only report what would be reclaimed')
+    args = parser.parse_args()
+
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    blob_store = LocalBlobStore(args.blob_dir) if args.blob_dir else None
+    database = MongoCatVotingDatabase(args.db_host, args.db_port, args.db_name, blob_store=blob_store)
+    reclaimer = MongoStorageReclaimer(database, args.declined_retention_days,
+                                      max_deletes_per_second=args.max_deletes_per_second)
+    reclaimer.run_once(dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
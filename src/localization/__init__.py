@@ -0,0 +1,3 @@
+from .catalog import LocalizationCatalog
+
+__all__ = ['LocalizationCatalog']
\ No newline at end of file
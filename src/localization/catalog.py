@@ -0,0 +1,75 @@
+import json
+import logging
+import os
+from string import Formatter
+
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+DEFAULT_LANGUAGE = "en"
+
+
+class LocalizationCatalog:
+    """Per-language UI strings loaded from ``<lang>.json`` files once.
+
+    Each language is compiled into a single flat dict that already contains
+    its fallbacks (``pt-BR`` -> ``pt`` -> default language), so a lookup is
+    one dict access. Strings without placeholders are returned as they are;
+    only templates with fields are formatted. Unknown keys come back as the
+    key itself.
+    """
+
+    def __init__(self, locales_dir=LOCALES_DIR, default_language=DEFAULT_LANGUAGE):
+        self.default_language = default_language
+        self._sources = {}
+        for filename in sorted(os.listdir(locales_dir)):
+            lang, ext = os.path.splitext(filename)
+            if ext != ".json":
+                continue
+            with open(os.path.join(locales_dir, filename), encoding="utf-8") as f:
+                self._sources[lang.lower()] = json.load(f)
+        if default_language not in self._sources:
+            raise ValueError(f"No catalog for the default language {default_language!r} in {locales_dir}")
+        self._compiled = {lang: self._compile(lang) for lang in self._sources}
+        logging.info("Loaded localization catalogs: %s", ", ".join(sorted(self._sources)))
+
+    @property
+    def languages(self):
+        return tuple(self._sources)
+
+    def fallback_chain(self, lang_code):
+        chain = []
+        if lang_code:
+            lang_code = lang_code.lower().replace("_", "-")
+            parts = lang_code.split("-")
+            chain = ["-".join(parts[:i]) for i in range(len(parts), 0, -1)]
+        chain.append(self.default_language)
+        return [lang for lang in dict.fromkeys(chain) if lang in self._sources]
+
+    def _compile(self, lang_code):
+        merged = {}
+        for lang in reversed(self.fallback_chain(lang_code)):
+            merged.update(self._sources[lang])
+        return {key: _compile_template(text) for key, text in merged.items()}
+
+    def resolve(self, lang_code):
+        """Return the language whose catalog serves ``lang_code``."""
+        return self.fallback_chain(lang_code)[0]
+
+    def catalog(self, lang_code):
+        compiled = self._compiled.get(lang_code)
+        if compiled is None:
+            # Codes like "en-US" or None are served by an existing catalog; remember the mapping
+            compiled = self._compiled[lang_code] = self._compiled[self.resolve(lang_code)]
+        return compiled
+
+    def get(self, lang_code, key, **kwargs):
+        text = self.catalog(lang_code).get(key, key)
+        if isinstance(text, str):
+            return text
+        return text(**kwargs)
+
+
+def _compile_template(text):
+    if any(field is not None for _, field, _, _ in Formatter().parse(text)):
+        return text.format
+    # Escaped braces still need one formatting pass to collapse
+    return text.format() if "{" in text or "}" in text else text
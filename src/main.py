@@ -1,7 +1,6 @@
 import logging
 import argparse
-from cat_contest import CatContest
-from telegram.ext import CallbackQueryHandler, ApplicationBuilder, CommandHandler, MessageHandler, filters
+import threading
 
 
 # Set up logging
@@ -18,13 +17,73 @@ def main():
     parser.add_argument('--aws_access_key', type=str, required=True, help='AWS Access Key')
     parser.add_argument('--aws_secret_key', type=str, required=True, help='AWS Secret Key')
     parser.add_argument('--aws_region', type=str, required=True, help='AWS Region Name')
-    parser.add_argument('--db_host', type=str, required=True, help='MongoDB host')
-    parser.add_argument('--db_port', type=int, required=True, help='MongoDB port')
-    parser.add_argument('--db_name', type=str, required=True, help='MongoDB database name')
+    parser.add_argument('--db_backend', type=str, choices=['mongo', 'memory'], default='mongo', help='Storage backend')
+    parser.add_argument('--db_host', type=str, help='MongoDB host')
+    parser.add_argument('--db_port', type=int, help='MongoDB port')
+    parser.add_argument('--db_name', type=str, help='MongoDB database name')
+    parser.add_argument('--db_max_pool_size', type=int, default=100, help='Maximum MongoDB connections')
+    parser.add_argument('--db_min_pool_size', type=int, default=0, help='MongoDB connections kept open when idle')
+    parser.add_argument('--db_connect_timeout_ms', type=int, default=20000, help='MongoDB connect timeout')
+    parser.add_argument('--db_server_selection_timeout_ms', type=int, default=30000, help='MongoDB server selection timeout')
+    parser.add_argument('--db_socket_timeout_ms', type=int, help='MongoDB socket timeout, none by default')
+    parser.add_argument('--data_dir', type=str, help='Snapshot and journal directory for the memory backend')
+    parser.add_argument('--snapshot_interval', type=int, default=1000, help='Journal entries between memory backend snapshots')
+    parser.add_argument('--blob_store', type=str, choices=['default', 'local'], default='default', help='Photo storage: the backend default (GridFS for mongo) or a local content-addressed store')
+    parser.add_argument('--blob_dir', type=str, help='Directory of the local blob store')
+    parser.add_argument('--reclaim_interval_hours', type=float, default=0, help='Hours between storage reclamation runs (0 disables them)')
+    parser.add_argument('--declined_retention_days', type=int, default=30, help='Days to keep declined photos before reclaiming them')
+    parser.add_argument('--metrics_port', type=int, default=0, help='Port of the Prometheus metrics endpoint (0 disables metrics)')
+    parser.add_argument('--metrics_host', type=str, default='127.0.0.1', help='Address the metrics endpoint binds to')
+    parser.add_argument('--slow_handler_seconds', type=float, help='Log handlers slower than this when metrics are enabled')
+    parser.add_argument('--admin_ids', type=int, nargs='*', default=[], help='Telegram user IDs allowed to run /profile')
+    parser.add_argument('--profile_dir', type=str, default='profiles', help='Directory for profiling reports (/profile or SIGUSR1)')
+    parser.add_argument('--aws_max_pool_connections', type=int, default=10, help='Concurrent Rekognition connections')
     args = parser.parse_args()
 
-    cat_contest = CatContest(args.token, args.aws_access_key, args.aws_secret_key, args.aws_region, args.db_host, args.db_port, args.db_name)
-    application = ApplicationBuilder().token(cat_contest.token).build()
+    # Heavy imports wait until the arguments are known to be valid
+    from cat_contest import CatContest
+    from db import InMemoryCatVotingDatabase
+    from storage import LocalBlobStore
+    from metrics import MetricsRegistry, instrument_database, instrument_handlers, instrument_moderation, start_metrics_server
+    from moderation import AmazonRekognitionModerationService
+    from profiling import HandlerProfiler
+    from telegram.ext import CallbackQueryHandler, ApplicationBuilder, CommandHandler, MessageHandler, filters
+
+    blob_store = None
+    if args.blob_store == 'local':
+        if args.blob_dir is None:
+            parser.error('--blob_dir is required for the local blob store')
+        blob_store = LocalBlobStore(args.blob_dir)
+
+    if args.db_backend == 'memory':
+        database = InMemoryCatVotingDatabase(args.data_dir, args.snapshot_interval, blob_store=blob_store)
+    elif args.db_host is None or args.db_port is None or args.db_name is None:
+        parser.error('--db_host, --db_port and --db_name are required for the mongo backend')
+    else:
+        from db import MongoCatVotingDatabase
+        database = MongoCatVotingDatabase(args.db_host, args.db_port, args.db_name, blob_store=blob_store,
+                                          max_pool_size=args.db_max_pool_size, min_pool_size=args.db_min_pool_size,
+                                          connect_timeout_ms=args.db_connect_timeout_ms,
+                                          server_selection_timeout_ms=args.db_server_selection_timeout_ms,
+                                          socket_timeout_ms=args.db_socket_timeout_ms)
+
+    moderation_service = AmazonRekognitionModerationService(args.aws_access_key, args.aws_secret_key, args.aws_region,
+                                                            max_pool_connections=args.aws_max_pool_connections)
+    cat_contest = CatContest(args.token, args.aws_access_key, args.aws_secret_key, args.aws_region, database=database,
+                             moderation_service=moderation_service)
+
+    if args.metrics_port:
+        registry = MetricsRegistry()
+        instrument_database(database, registry)
+        instrument_moderation(cat_contest.moderation_service, registry)
+        instrument_handlers(cat_contest, registry, args.slow_handler_seconds)
+        start_metrics_server(registry, args.metrics_port, args.metrics_host)
+
+    async def start_warm_up(application):
+        # Runs as polling starts; indexes, clients and caches are primed without delaying it
+        threading.Thread(target=cat_contest.warm_up, name="warm-up", daemon=True).start()
+
+    application = ApplicationBuilder().token(cat_contest.token).post_init(start_warm_up).build()
 
     application.add_handler(CommandHandler("start", cat_contest.start))
     application.add_handler(CommandHandler("vote", cat_contest.vote))
@@ -33,7 +92,24 @@ def main():
     application.add_handler(CallbackQueryHandler(cat_contest.button))
     application.add_handler(MessageHandler(filters.PHOTO, cat_contest.photo_handler))
 
+    profiler = HandlerProfiler(cat_contest, args.profile_dir, args.admin_ids)
+    profiler.install_signal_handler()
+    if args.admin_ids:
+        application.add_handler(CommandHandler("profile", profiler.profile_command))
+
+    reclaimer = None
+    if args.reclaim_interval_hours > 0 and args.db_backend == 'mongo':
+        from db import MongoStorageReclaimer
+        reclaimer = MongoStorageReclaimer(database, args.declined_retention_days)
+        reclaimer.start(args.reclaim_interval_hours * 3600)
+
     application.run_polling()
 
+    if reclaimer is not None:
+        reclaimer.stop()
+
+    if args.db_backend == 'memory':
+        database.close()
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,5 @@
+from .registry import MetricsRegistry
+from .instrumentation import instrument_handlers, instrument_database, instrument_moderation
+from .server import start_metrics_server
+
+__all__ = ['MetricsRegistry', 'instrument_handlers', 'instrument_database', 'instrument_moderation', 'start_metrics_server']
\ No newline at end of file
@@ -0,0 +1,103 @@
+import logging
+import time
+from functools import wraps
+from db import CatVotingDatabaseInterface
+
+HANDLERS = ("start", "vote", "process_vote", "show_results", "show_users_photos_rating", "photo_handler")
+REKOGNITION_OPERATIONS = ("detect_moderation_labels", "detect_labels")
+# Rekognition image APIs are billed per call; first pricing tier, USD
+REKOGNITION_COST_PER_CALL = 0.001
+
+# Instrumentation replaces methods on the given instances, so nothing here
+# runs unless it was switched on; uninstrumented objects pay no overhead.
+
+
+def instrument_handlers(contest, registry, slow_handler_seconds=None, handlers=HANDLERS):
+    latency = registry.histogram("cat_contest_handler_seconds", "Telegram handler latency in seconds.", ("handler",))
+    failures = registry.counter("cat_contest_handler_errors", "Telegram handler calls that raised.", ("handler",))
+    for name in handlers:
+        setattr(contest, name, _timed_async(name, getattr(contest, name), latency.labels(name),
+                                             failures.labels(name), slow_handler_seconds))
+
+
+def instrument_database(database, registry):
+    latency = registry.histogram("cat_contest_db_seconds", "Voting database method latency in seconds.", ("method",))
+    failures = registry.counter("cat_contest_db_errors", "Voting database calls that raised.", ("method",))
+    for name in sorted(CatVotingDatabaseInterface.__abstractmethods__):
+        setattr(database, name, _timed(getattr(database, name), latency.labels(name), failures.labels(name)))
+
+    blob_store = getattr(database, "blob_store", None)
+    if blob_store is not None:
+        store = type(blob_store).__name__
+        read_bytes = registry.counter("cat_contest_photo_read_bytes", "Photo bytes read from the blob store.", ("store",)).labels(store)
+        reads = registry.counter("cat_contest_photo_reads", "Photo reads from the blob store.", ("store",)).labels(store)
+        get = blob_store.get
+
+        @wraps(get)
+        def counted_get(blob_id):
+            data = get(blob_id)
+            reads.inc()
+            read_bytes.inc(len(data))
+            return data
+
+        blob_store.get = counted_get
+
+
+def instrument_moderation(moderation_service, registry, cost_per_call=REKOGNITION_COST_PER_CALL):
+    latency = registry.histogram("cat_contest_rekognition_seconds", "Amazon Rekognition call latency in seconds.", ("operation",))
+    failures = registry.counter("cat_contest_rekognition_errors", "Amazon Rekognition calls that raised.", ("operation",))
+    cost = registry.counter("cat_contest_rekognition_cost_usd", "Estimated Amazon Rekognition spend in USD.", ("operation",))
+
+    # The service swallows client errors, so the boto client calls themselves are wrapped
+    def instrument_client(client):
+        for operation in REKOGNITION_OPERATIONS:
+            method = getattr(client, operation, None)
+            if method is None:
+                continue
+            charged = _charged(method, cost.labels(operation), cost_per_call)
+            setattr(client, operation, _timed(charged, latency.labels(operation), failures.labels(operation)))
+
+    add_client_hook = getattr(moderation_service, "add_client_hook", None)
+    if add_client_hook is not None:
+        add_client_hook(instrument_client)
+
+
+def _timed(method, histogram, failures):
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            failures.inc()
+            raise
+        finally:
+            histogram.observe(time.perf_counter() - start)
+    return wrapper
+
+
+def _timed_async(name, handler, histogram, failures, slow_handler_seconds):
+    @wraps(handler)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await handler(*args, **kwargs)
+        except Exception:
+            failures.inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            histogram.observe(elapsed)
+            if slow_handler_seconds is not None and elapsed > slow_handler_seconds:
+                logging.warning("Slow handler %s took %.3fs", name, elapsed)
+    return wrapper
+
+
+def _charged(method, cost, cost_per_call):
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        result = method(*args, **kwargs)
+        # Failed calls are not billed
+        cost.inc(cost_per_call)
+        return result
+    return wrapper
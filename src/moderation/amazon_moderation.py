@@ -1,21 +1,79 @@
-import boto3
 import logging
+import threading
 from botocore.exceptions import BotoCoreError, ClientError
 from .moderation_interface import ImageModerationService
 
+_session = None
+# boto3 sessions are not thread-safe, so clients are created under this lock
+_session_lock = threading.Lock()
+
+
+def get_boto_session():
+    """Return the process-wide boto3 session, importing boto3 on first use."""
+    global _session
+    if _session is None:
+        import boto3
+        _session = boto3.session.Session()
+    return _session
+
+
 class AmazonRekognitionModerationService(ImageModerationService):
-    def __init__(self, aws_access_key, aws_secret_key, region_name):
+    def __init__(self, aws_access_key, aws_secret_key, region_name, max_pool_connections=10,
+                 connect_timeout=5, read_timeout=30, max_attempts=3):
+        self.aws_access_key = aws_access_key
+        self.aws_secret_key = aws_secret_key
+        self.region_name = region_name
+        # Pool size bounds how many moderations can be in flight at once
+        self.client_config = {
+            "max_pool_connections": max_pool_connections,
+            "connect_timeout": connect_timeout,
+            "read_timeout": read_timeout,
+            "retries": {'max_attempts': max_attempts, 'mode': 'standard'}
+        }
+        self._client = None
+        self._client_hooks = []
+
+    @property
+    def client(self):
+        if self._client is None:
+            with _session_lock:
+                if self._client is None:
+                    self._client = self._apply_client_hooks(self._create_client())
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = self._apply_client_hooks(client)
+
+    def add_client_hook(self, hook):
+        """Call ``hook(client)`` on the Rekognition client now if it exists, else once it is created."""
+        with _session_lock:
+            self._client_hooks.append(hook)
+            if self._client is not None:
+                hook(self._client)
+
+    def _apply_client_hooks(self, client):
+        for hook in self._client_hooks:
+            hook(client)
+        return client
+
+    def _create_client(self):
+        from botocore.config import Config
         try:
-            self.client = boto3.client(
+            return get_boto_session().client(
                 'rekognition',
-                aws_access_key_id=aws_access_key,
-                aws_secret_access_key=aws_secret_key,
-                region_name=region_name
+                aws_access_key_id=self.aws_access_key,
+                aws_secret_access_key=self.aws_secret_key,
+                region_name=self.region_name,
+                config=Config(**self.client_config)
             )
         except (BotoCoreError, ClientError) as e:
             logging.error(f"Failed to create Amazon Rekognition client: {e}")
             raise
 
+    def warm_up(self):
+        return self.client
+
     def moderate_image(self, image_path):
         try:
             with open(image_path, 'rb') as image_file:
@@ -0,0 +1,3 @@
+from .profiler import HandlerProfiler, ProfilingSession
+
+__all__ = ['HandlerProfiler', 'ProfilingSession']
\ No newline at end of file
@@ -0,0 +1,229 @@
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from functools import wraps
+
+DEFAULT_SAMPLE_INTERVAL = 0.005
+DEFAULT_WINDOW_SECONDS = 30
+MAX_WINDOW_SECONDS = 600
+TOP_ALLOCATIONS = 20
+# Frames kept per allocation, so allocations made deep inside PIL or a driver still show the wrapped file
+TRACEBACK_FRAMES = 10
+# tracemalloc.reset_peak() is new in Python 3.9; without it peaks are not reported
+_HAS_RESET_PEAK = hasattr(tracemalloc, "reset_peak")
+
+
+class ProfilingSession:
+    """One profiling window over a running CatContest.
+
+    A daemon thread samples the stack of the bot's event loop thread and keeps
+    the samples that pass through CatContest code; they are written in the
+    folded format read by flamegraph.pl and speedscope. Meanwhile
+    ``preprocess_image`` and photo reads from the blob store record their
+    traced memory growth and peak on every call. Only their first call in the
+    window is bracketed by a pair of tracemalloc snapshots, which attribute
+    that call's allocations to lines once the window ends. Taking a snapshot
+    copies every live trace on the calling thread, so that first call holds
+    up the event loop: about 0.2 s per snapshot with 200k live blocks. Full
+    snapshots are also taken at the start and end of the window; filtering
+    and comparing them happens on the profiler thread after tracing stops.
+    The wrapped methods are restored afterwards.
+    """
+
+    def __init__(self, contest, output_dir, seconds, thread_id=None, sample_interval=DEFAULT_SAMPLE_INTERVAL):
+        self.contest = contest
+        self.seconds = seconds
+        self.sample_interval = sample_interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.contest_file = sys.modules[type(contest).__module__].__file__
+
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        os.makedirs(output_dir, exist_ok=True)
+        self.stacks_path = os.path.join(output_dir, f"profile-{stamp}.collapsed")
+        self.allocations_path = os.path.join(output_dir, f"profile-{stamp}-allocations.txt")
+
+        self.stacks = Counter()
+        self.samples = 0
+        self.calls = Counter()
+        self.peaks = Counter()
+        self.retained = Counter()
+        self.first_calls = {}
+        self._start_snapshot = None
+        self._patched = []
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        tracemalloc.start(TRACEBACK_FRAMES)
+        self._start_snapshot = tracemalloc.take_snapshot()
+        self._patch(self.contest, "preprocess_image", "preprocess_image")
+        blob_store = getattr(self.contest.db, "blob_store", None)
+        if blob_store is not None:
+            self._patch(blob_store, "get", f"{type(blob_store).__name__}.get")
+        else:
+            self._patch(self.contest.db, "get_photo", "get_photo")
+        self._thread = threading.Thread(target=self._run, name="handler-profiler", daemon=True)
+        self._thread.start()
+        logging.info("Profiling handlers for %ss into %s", self.seconds, self.stacks_path)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def join(self):
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        deadline = time.monotonic() + self.seconds
+        try:
+            while time.monotonic() < deadline and not self._stop_event.wait(self.sample_interval):
+                self._sample()
+        finally:
+            self._unpatch()
+            final_snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self._write_stacks()
+            self._write_allocations(final_snapshot)
+            logging.info("Profiling finished: %s samples, reports in %s and %s",
+                         self.samples, self.stacks_path, self.allocations_path)
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        names = []
+        in_contest = False
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename == self.contest_file:
+                in_contest = True
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        self.samples += 1
+        # Samples of the idle event loop say nothing about handlers
+        if in_contest:
+            self.stacks[";".join(reversed(names))] += 1
+
+    def _patch(self, obj, name, label):
+        had_own = name in vars(obj)
+        original = getattr(obj, name)
+        code = getattr(getattr(original, "__func__", original), "__code__", None)
+        filename = code.co_filename if code is not None else None
+
+        @wraps(original)
+        def wrapper(*args, **kwargs):
+            if not tracemalloc.is_tracing():
+                return original(*args, **kwargs)
+            # A snapshot copies every live trace, so only the first call pays for a pair
+            before = tracemalloc.take_snapshot() if filename is not None and label not in self.first_calls else None
+            start_size, _ = tracemalloc.get_traced_memory()
+            if _HAS_RESET_PEAK:
+                tracemalloc.reset_peak()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                size, peak = tracemalloc.get_traced_memory()
+                self.calls[label] += 1
+                if _HAS_RESET_PEAK:
+                    self.peaks[label] = max(self.peaks[label], peak - start_size)
+                self.retained[label] += size - start_size
+                if before is not None:
+                    self.first_calls[label] = (filename, before, tracemalloc.take_snapshot())
+
+        setattr(obj, name, wrapper)
+        self._patched.append((obj, name, original if had_own else None))
+
+    def _unpatch(self):
+        for obj, name, original in reversed(self._patched):
+            if original is None:
+                delattr(obj, name)
+            else:
+                setattr(obj, name, original)
+        self._patched = []
+
+    def _write_stacks(self):
+        with open(self.stacks_path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def _write_allocations(self, final_snapshot):
+        own_traces = (tracemalloc.Filter(False, tracemalloc.__file__),)
+        with open(self.allocations_path, "w", encoding="utf-8") as f:
+            f.write(f"Allocation report for a {self.seconds}s window, "
+                    f"{self.samples} stack samples ({sum(self.stacks.values())} in handlers)\n")
+            for label in sorted(self.calls):
+                peak = f", max peak {self.peaks[label]} bytes" if _HAS_RESET_PEAK else ""
+                f.write(f"\n{label}: {self.calls[label]} calls{peak}, "
+                        f"{self.retained[label]} bytes still live on return in total\n")
+                if label not in self.first_calls:
+                    continue
+                f.write("  live after the first call, by line:\n")
+                for line, size in _call_allocations(*self.first_calls[label]).most_common(TOP_ALLOCATIONS):
+                    f.write(f"  {size:>12} B  {line}\n")
+            f.write("\nLive allocations made during the window, by line:\n")
+            for stat in _growth(final_snapshot.filter_traces(own_traces), self._start_snapshot.filter_traces(own_traces)):
+                f.write(f"  {stat.size_diff:>12} B  {stat.count_diff:>8} blocks  {stat.traceback[0]}\n")
+
+
+def _call_allocations(filename, before, after):
+    """Sum what one call left allocated by line, keeping traces that pass through ``filename``."""
+    allocations = Counter()
+    for stat in after.compare_to(before, "traceback"):
+        # Frames run from the oldest to the allocating one; requiring the wrapped file drops most
+        # of what other threads allocated while the call ran
+        allocating = stat.traceback[-1]
+        if stat.size_diff <= 0 or allocating.filename in (__file__, tracemalloc.__file__):
+            continue
+        if any(frame.filename == filename for frame in stat.traceback):
+            allocations[str(allocating)] += stat.size_diff
+    return allocations
+
+
+def _growth(snapshot, baseline):
+    return [stat for stat in snapshot.compare_to(baseline, "lineno") if stat.size_diff > 0][:TOP_ALLOCATIONS]
+
+
+class HandlerProfiler:
+    """Starts profiling sessions from an admin-only /profile command or a signal."""
+
+    def __init__(self, contest, output_dir, admin_ids=(), default_seconds=DEFAULT_WINDOW_SECONDS):
+        self.contest = contest
+        self.output_dir = output_dir
+        self.admin_ids = set(admin_ids)
+        self.default_seconds = default_seconds
+        self.session = None
+
+    def start(self, seconds=None, thread_id=None):
+        if self.session is not None and self.session._thread.is_alive():
+            logging.warning("Profiling already running, ignoring request.")
+            return None
+        seconds = min(seconds or self.default_seconds, MAX_WINDOW_SECONDS)
+        self.session = ProfilingSession(self.contest, self.output_dir, seconds, thread_id)
+        self.session.start()
+        return self.session
+
+    async def profile_command(self, update, context) -> None:
+        user_id = update.message.from_user.id
+        if user_id not in self.admin_ids:
+            logging.warning("User %s is not allowed to profile the bot", user_id)
+            return
+        try:
+            seconds = float(context.args[0]) if context.args else None
+        except ValueError:
+            await update.message.reply_text("Usage: /profile [seconds]")
+            return
+        session = self.start(seconds)
+        if session is None:
+            await update.message.reply_text("Profiling is already running.")
+            return
+        await update.message.reply_text(
+            f"Profiling for {session.seconds}s. Results: {session.stacks_path}, {session.allocations_path}")
+
+    def install_signal_handler(self, signum=getattr(signal, "SIGUSR1", None)):
+        """Start a default-length session on ``signum`` (SIGUSR1); the handler runs on the main thread."""
+        if signum is None:
+            return
+        signal.signal(signum, lambda received, frame: self.start())
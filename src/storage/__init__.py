@@ -0,0 +1,8 @@
+from utils import lazy_exports
+from .blob_store_interface import BlobStore
+from .local_blob_store import LocalBlobStore
+from .memory_blob_store import InMemoryBlobStore
+
+__all__ = ['BlobStore', 'GridFSBlobStore', 'LocalBlobStore', 'InMemoryBlobStore']
+
+__getattr__ = lazy_exports(__name__, {'GridFSBlobStore': '.gridfs_blob_store'})
\ No newline at end of file
@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+
+class BlobStore(ABC):
+
+    @abstractmethod
+    def put(self, blob_id, image_file, filename, user_id):
+        pass
+
+    @abstractmethod
+    def get(self, blob_id):
+        pass
+
+    @abstractmethod
+    def delete(self, blob_id):
+        pass
+
+    @abstractmethod
+    def exists(self, blob_id):
+        pass
+
+    @abstractmethod
+    def size(self, blob_id):
+        pass
+
+    @abstractmethod
+    def iter_blobs(self, batch_size=None):
+        pass
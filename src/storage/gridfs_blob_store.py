@@ -0,0 +1,36 @@
+import gridfs
+import logging
+from pymongo import errors
+from .blob_store_interface import BlobStore
+
+class GridFSBlobStore(BlobStore):
+    def __init__(self, db):
+        try:
+            self.db = db
+            self.fs = gridfs.GridFS(db)
+        except errors.PyMongoError as e:
+            logging.error(f"GridFS initialization error: {e}")
+            raise
+
+    def put(self, blob_id, image_file, filename, user_id):
+        return self.fs.put(image_file, _id=blob_id, filename=filename, user_id=user_id)
+
+    def get(self, blob_id):
+        return self.fs.get(blob_id).read()
+
+    def delete(self, blob_id):
+        self.fs.delete(blob_id)
+
+    def exists(self, blob_id):
+        return self.fs.exists(blob_id)
+
+    def size(self, blob_id):
+        file_doc = self.db['fs.files'].find_one({"_id": blob_id}, {"length": 1})
+        return file_doc.get("length", 0) if file_doc else 0
+
+    def iter_blobs(self, batch_size=None):
+        # Streams the files collection only; chunks are never touched. Small batches keep
+        # the cursor fetching while a slow consumer works, so it does not time out idle.
+        cursor = self.db['fs.files'].find({}, {"length": 1}, batch_size=batch_size or 0)
+        for file_doc in cursor:
+            yield file_doc["_id"], file_doc.get("length", 0)
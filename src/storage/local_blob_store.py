@@ -0,0 +1,103 @@
+import hashlib
+import logging
+import os
+from .blob_store_interface import BlobStore
+
+OBJECTS_DIRNAME = "objects"
+REFS_DIRNAME = "refs"
+LINK_ATTEMPTS = 3
+
+
+class LocalBlobStore(BlobStore):
+    """Content-addressed blob store on the local filesystem.
+
+    Each distinct payload is written once under ``objects/ab/cd/<sha256>``.
+    A blob id is a hard link to its object under ``refs/<shard>/<id>``, so
+    identical uploads share one inode, a read opens the ref directly without
+    resolving the digest, and the link count tells when the last reference
+    to an object is gone.
+    The root directory must live on a filesystem that supports hard links.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.objects_dir = os.path.join(root, OBJECTS_DIRNAME)
+        self.refs_dir = os.path.join(root, REFS_DIRNAME)
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.refs_dir, exist_ok=True)
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:4], digest)
+
+    def _ref_path(self, blob_id):
+        blob_id = str(blob_id)
+        return os.path.join(self.refs_dir, blob_id[-2:], blob_id)
+
+    def put(self, blob_id, image_file, filename, user_id):
+        data = image_file.read() if hasattr(image_file, 'read') else image_file
+        digest = hashlib.sha256(data).hexdigest()
+        object_path = self._object_path(digest)
+        if not os.path.exists(object_path):
+            self._write_object(object_path, data)
+        else:
+            logging.debug(f"Blob {blob_id} deduplicated against object {digest}")
+
+        ref_path = self._ref_path(blob_id)
+        os.makedirs(os.path.dirname(ref_path), exist_ok=True)
+        tmp_ref = f"{ref_path}.{os.getpid()}.tmp"
+        for attempt in range(LINK_ATTEMPTS):
+            try:
+                os.link(object_path, tmp_ref)
+                break
+            except FileNotFoundError:
+                # delete() dropped the last reference to the object after the exists check
+                if attempt == LINK_ATTEMPTS - 1:
+                    raise
+                logging.debug(f"Object {digest} was reclaimed while storing blob {blob_id}, rewriting it")
+                self._write_object(object_path, data)
+        os.replace(tmp_ref, ref_path)
+        return blob_id
+
+    def _write_object(self, object_path, data):
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        tmp_path = f"{object_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, object_path)
+
+    def get(self, blob_id):
+        with open(self._ref_path(blob_id), 'rb') as f:
+            return f.read()
+
+    def delete(self, blob_id):
+        ref_path = self._ref_path(blob_id)
+        try:
+            links = os.stat(ref_path).st_nlink
+        except FileNotFoundError:
+            return
+        if links <= 2:
+            # Only this ref and the object itself remain, so the object goes too
+            with open(ref_path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            object_path = self._object_path(digest)
+            if os.path.exists(object_path) and os.path.samefile(object_path, ref_path):
+                os.remove(object_path)
+        os.remove(ref_path)
+
+    def exists(self, blob_id):
+        return os.path.exists(self._ref_path(blob_id))
+
+    def size(self, blob_id):
+        try:
+            return os.stat(self._ref_path(blob_id)).st_size
+        except FileNotFoundError:
+            return 0
+
+    def iter_blobs(self, batch_size=None):
+        for shard in os.scandir(self.refs_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.tmp'):
+                    continue
+                yield entry.name, entry.stat().st_size
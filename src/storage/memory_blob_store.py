@@ -0,0 +1,25 @@
+from .blob_store_interface import BlobStore
+
+class InMemoryBlobStore(BlobStore):
+    def __init__(self):
+        self.blobs = {}
+
+    def put(self, blob_id, image_file, filename, user_id):
+        self.blobs[blob_id] = image_file.read() if hasattr(image_file, 'read') else bytes(image_file)
+        return blob_id
+
+    def get(self, blob_id):
+        return self.blobs[blob_id]
+
+    def delete(self, blob_id):
+        self.blobs.pop(blob_id, None)
+
+    def exists(self, blob_id):
+        return blob_id in self.blobs
+
+    def size(self, blob_id):
+        return len(self.blobs.get(blob_id, b''))
+
+    def iter_blobs(self, batch_size=None):
+        for blob_id, data in list(self.blobs.items()):
+            yield blob_id, len(data)
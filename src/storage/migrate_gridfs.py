@@ -0,0 +1,53 @@
+import argparse
+import logging
+from pymongo import MongoClient, errors
+from storage import GridFSBlobStore, LocalBlobStore
+
+
+def migrate_blobs(source: GridFSBlobStore, target, verify=True, delete_source=False):
+    """Copy every GridFS file into ``target`` under the same id.
+
+    Files already present in the target are skipped, so an interrupted run can
+    simply be restarted. Returns counters of what was copied.
+    """
+    stats = {"copied": 0, "skipped": 0, "failed": 0, "bytes": 0}
+    for grid_out in source.fs.find(no_cursor_timeout=True):
+        blob_id = grid_out._id
+        if target.exists(blob_id):
+            stats["skipped"] += 1
+            continue
+        try:
+            data = grid_out.read()
+            target.put(blob_id, data, grid_out.filename, getattr(grid_out, 'user_id', None))
+            if verify and target.get(blob_id) != data:
+                raise ValueError("content mismatch after copy")
+            if delete_source:
+                source.delete(blob_id)
+            stats["copied"] += 1
+            stats["bytes"] += len(data)
+        except (errors.PyMongoError, OSError, ValueError) as e:
+            logging.error(f"Error migrating blob ID: {blob_id}: {e}")
+            stats["failed"] += 1
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Copy cat photos from GridFS into a local blob store.')
+    parser.add_argument('--db_host', type=str, required=True, help='MongoDB host')
+    parser.add_argument('--db_port', type=int, required=True, help='MongoDB port')
+    parser.add_argument('--db_name', type=str, required=True, help='MongoDB database name')
+    parser.add_argument('--blob_dir', type=str, required=True, help='Directory of the local blob store')
+    parser.add_argument('--no_verify', action='store_true', help='Skip reading back each copied file')
+    parser.add_argument('--delete_source', action='store_true', help='Delete each GridFS file once it is copied')
+    args = parser.parse_args()
+
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    client = MongoClient(args.db_host, args.db_port)
+    source = GridFSBlobStore(client[args.db_name])
+    target = LocalBlobStore(args.blob_dir)
+    stats = migrate_blobs(source, target, verify=not args.no_verify, delete_source=args.delete_source)
+    logging.info(f"Migration finished: {stats}")
+
+
+if __name__ == '__main__':
+    main()
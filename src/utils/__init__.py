@@ -1,3 +1,4 @@
+from .lazy_exports import lazy_exports
 from .rating_calculation import calculate_new_ratings, DEFAULT_RATING
 
-__all__ = ['calculate_new_ratings', 'DEFAULT_RATING']
\ No newline at end of file
+__all__ = ['calculate_new_ratings', 'DEFAULT_RATING', 'lazy_exports']
\ No newline at end of file
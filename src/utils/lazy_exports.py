@@ -0,0 +1,18 @@
+import sys
+from importlib import import_module
+
+
+def lazy_exports(package, exports):
+    """Return a module ``__getattr__`` (PEP 562) for ``package`` that imports
+    each name in ``exports`` from its relative module on first access.
+
+    Used for classes whose modules pull in heavy dependencies such as pymongo,
+    so importing the package stays cheap when they are not needed.
+    """
+    def __getattr__(name):
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(import_module(exports[name], package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+    return __getattr__
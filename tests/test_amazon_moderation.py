@@ -3,10 +3,12 @@ from unittest.mock import patch, MagicMock
 from moderation import AmazonRekognitionModerationService
 
 class TestAmazonRekognitionModerationService(unittest.TestCase):
-    @patch('moderation.amazon_moderation.boto3.client')
-    def setUp(self, mock_boto_client):
+    def setUp(self):
+        patcher = patch('moderation.amazon_moderation.get_boto_session')
+        self.mock_get_session = patcher.start()
+        self.addCleanup(patcher.stop)
         self.mock_client = MagicMock()
-        mock_boto_client.return_value = self.mock_client
+        self.mock_get_session.return_value.client.return_value = self.mock_client
 
         self.service = AmazonRekognitionModerationService(
             aws_access_key='fake_access_key',
@@ -14,6 +16,18 @@ class TestAmazonRekognitionModerationService(unittest.TestCase):
             region_name='fake_region'
         )
 
+    def test_client_created_lazily_once(self):
+        self.mock_get_session.return_value.client.assert_not_called()
+
+        self.assertIs(self.service.client, self.mock_client)
+        self.assertIs(self.service.client, self.mock_client)
+
+        self.mock_get_session.return_value.client.assert_called_once()
+        args, kwargs = self.mock_get_session.return_value.client.call_args
+        self.assertEqual(args, ('rekognition',))
+        self.assertEqual(kwargs['region_name'], 'fake_region')
+        self.assertEqual(kwargs['config'].max_pool_connections, 10)
+
     @patch('builtins.open', new_callable=unittest.mock.mock_open, read_data=b'test_image_data')
     def test_moderate_image_cat_found(self, mock_open):
         self.mock_client.detect_moderation_labels.return_value = {'ModerationLabels': []}
@@ -0,0 +1,105 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from storage import GridFSBlobStore, LocalBlobStore, InMemoryBlobStore
+from storage.migrate_gridfs import migrate_blobs
+
+class TestLocalBlobStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.store = LocalBlobStore(self.tmp_dir.name)
+
+    def count_objects(self):
+        return sum(len(files) for _, _, files in os.walk(self.store.objects_dir))
+
+    def test_put_and_get(self):
+        self.store.put('photo1', io.BytesIO(b'cat'), 'cat.jpg', 1)
+
+        self.assertTrue(self.store.exists('photo1'))
+        self.assertEqual(self.store.get('photo1'), b'cat')
+
+    def test_get_empty_blob(self):
+        self.store.put('empty', b'', 'empty.jpg', 1)
+        self.assertEqual(self.store.get('empty'), b'')
+        self.assertEqual(self.store.size('empty'), 0)
+
+    def test_get_missing_blob(self):
+        with self.assertRaises(FileNotFoundError):
+            self.store.get('missing')
+
+    def test_identical_content_is_deduplicated(self):
+        self.store.put('photo1', b'same cat', 'a.jpg', 1)
+        self.store.put('photo2', b'same cat', 'b.jpg', 2)
+        self.store.put('photo3', b'other cat', 'c.jpg', 2)
+
+        self.assertEqual(self.count_objects(), 2)
+        self.assertEqual(sorted(self.store.iter_blobs()), [('photo1', 8), ('photo2', 8), ('photo3', 9)])
+
+    def test_delete_keeps_shared_object_until_last_ref(self):
+        self.store.put('photo1', b'same cat', 'a.jpg', 1)
+        self.store.put('photo2', b'same cat', 'b.jpg', 2)
+
+        self.store.delete('photo1')
+        self.assertFalse(self.store.exists('photo1'))
+        self.assertEqual(self.store.get('photo2'), b'same cat')
+        self.assertEqual(self.count_objects(), 1)
+
+        self.store.delete('photo2')
+        self.assertEqual(self.count_objects(), 0)
+
+    def test_put_rewrites_object_reclaimed_before_link(self):
+        self.store.put('photo1', b'same cat', 'a.jpg', 1)
+        link = os.link
+
+        def reclaim_then_link(src, dst):
+            # The reclaimer deletes the only other reference right after put's exists check
+            if self.store.exists('photo1'):
+                self.store.delete('photo1')
+            link(src, dst)
+
+        with patch('storage.local_blob_store.os.link', side_effect=reclaim_then_link):
+            self.store.put('photo2', b'same cat', 'b.jpg', 2)
+
+        self.assertFalse(self.store.exists('photo1'))
+        self.assertEqual(self.store.get('photo2'), b'same cat')
+        self.assertEqual(self.count_objects(), 1)
+
+    def test_delete_missing_blob(self):
+        self.store.delete('missing')
+
+class TestGridFSBlobStore(unittest.TestCase):
+    @patch('storage.gridfs_blob_store.gridfs.GridFS')
+    def test_iter_blobs_fetches_in_batches(self, mock_gridfs):
+        db = MagicMock()
+        db['fs.files'].find.return_value = [{"_id": 'photo1', "length": 5}]
+        store = GridFSBlobStore(db)
+
+        self.assertEqual(list(store.iter_blobs(batch_size=100)), [('photo1', 5)])
+        db['fs.files'].find.assert_called_once_with({}, {"length": 1}, batch_size=100)
+
+class TestMigrateBlobs(unittest.TestCase):
+    def make_grid_out(self, blob_id, data):
+        grid_out = MagicMock()
+        grid_out._id = blob_id
+        grid_out.filename = f'{blob_id}.jpg'
+        grid_out.user_id = 1
+        grid_out.read.return_value = data
+        return grid_out
+
+    def test_migrate_blobs(self):
+        source = MagicMock()
+        source.fs.find.return_value = [self.make_grid_out('photo1', b'cat1'), self.make_grid_out('photo2', b'cat22')]
+        target = InMemoryBlobStore()
+        target.put('photo2', b'cat22', 'photo2.jpg', 1)
+
+        stats = migrate_blobs(source, target, delete_source=True)
+
+        self.assertEqual(stats, {"copied": 1, "skipped": 1, "failed": 0, "bytes": 4})
+        self.assertEqual(target.get('photo1'), b'cat1')
+        source.delete.assert_called_once_with('photo1')
+
+if __name__ == '__main__':
+    unittest.main()
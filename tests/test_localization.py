@@ -0,0 +1,79 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from cat_contest import CatContest
+from db import InMemoryCatVotingDatabase
+from localization import LocalizationCatalog
+
+class TestLocalizationCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        catalogs = {
+            "en": {"hello": "Hello", "greet": "Hello, {name}!", "braces": "{{literal}}", "only_en": "English"},
+            "pt": {"hello": "Olá", "greet": "Olá, {name}!"},
+            "pt-BR": {"hello": "Oi"}
+        }
+        for lang, texts in catalogs.items():
+            with open(os.path.join(self.tmp_dir.name, f"{lang}.json"), "w", encoding="utf-8") as f:
+                json.dump(texts, f)
+        self.catalog = LocalizationCatalog(self.tmp_dir.name)
+
+    def test_get_formats_placeholders(self):
+        self.assertEqual(self.catalog.get("en", "greet", name="Tom"), "Hello, Tom!")
+        self.assertEqual(self.catalog.get("en", "braces"), "{literal}")
+
+    def test_fallback_chain(self):
+        self.assertEqual(self.catalog.fallback_chain("pt_BR"), ["pt-br", "pt", "en"])
+        self.assertEqual(self.catalog.get("pt-BR", "hello"), "Oi")
+        self.assertEqual(self.catalog.get("pt-BR", "greet", name="Ana"), "Olá, Ana!")
+        self.assertEqual(self.catalog.get("pt-BR", "only_en"), "English")
+
+    def test_unknown_language_and_key(self):
+        self.assertEqual(self.catalog.get("de", "hello"), "Hello")
+        self.assertEqual(self.catalog.get(None, "hello"), "Hello")
+        self.assertEqual(self.catalog.get("en", "missing_key"), "missing_key")
+
+    def test_missing_default_language(self):
+        with self.assertRaises(ValueError):
+            LocalizationCatalog(self.tmp_dir.name, default_language="fr")
+
+    def test_bundled_catalogs_have_the_same_keys(self):
+        catalog = LocalizationCatalog()
+        self.assertEqual(set(catalog.languages), {"en", "ru"})
+        self.assertEqual(set(catalog.catalog("ru")), set(catalog._sources["en"]))
+        self.assertEqual(catalog.get("ru", "thanks_voting", winner="Кот слева"),
+                         "Спасибо за голосование! Вы проголосовали за Кот слева.")
+
+class TestKeyboardTemplates(unittest.TestCase):
+    def setUp(self):
+        self.contest = CatContest('token', None, None, None, database=InMemoryCatVotingDatabase(),
+                                  moderation_service=MagicMock())
+
+    def test_create_keyboard(self):
+        markup = self.contest.create_keyboard([{"_id": "a"}, {"_id": "b"}], "ru")
+
+        vote_row = markup.inline_keyboard[0]
+        self.assertEqual([b.text for b in vote_row], ["Кот слева", "Кот справа"])
+        self.assertEqual([b.callback_data for b in vote_row], ["vote_a_b_1", "vote_a_b_2"])
+        self.assertEqual([row[0].callback_data for row in markup.inline_keyboard[1:]],
+                         ["show_results", "display_users_photos", "add_photo"])
+
+    def test_static_rows_are_shared_between_votes(self):
+        first = self.contest.create_keyboard([{"_id": "a"}, {"_id": "b"}], "en")
+        second = self.contest.create_keyboard([{"_id": "c"}, {"_id": "d"}], "en")
+
+        self.assertIs(first.inline_keyboard[1][0], second.inline_keyboard[1][0])
+        self.assertEqual(second.inline_keyboard[0][1].callback_data, "vote_c_d_2")
+
+    def test_cached_markup(self):
+        markup = self.contest.cached_markup("en", "next_action_after_results")
+
+        self.assertIs(markup, self.contest.cached_markup("en", "next_action_after_results"))
+        self.assertEqual([row[0].text for row in markup.inline_keyboard],
+                         ["Continue voting", "Add my cat photo", "Display my photos"])
+
+if __name__ == '__main__':
+    unittest.main()
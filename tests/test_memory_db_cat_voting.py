@@ -0,0 +1,145 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from db import InMemoryCatVotingDatabase
+from db.memory_database import JOURNAL_FILENAME, ROTATED_JOURNAL_FILENAME, SNAPSHOT_FILENAME
+from utils import DEFAULT_RATING
+
+def make_user(user_id):
+    mock_user = MagicMock()
+    mock_user.id = user_id
+    mock_user.first_name = 'John'
+    mock_user.last_name = 'Doe'
+    mock_user.username = 'johndoe'
+    mock_user.language_code = 'en'
+    return mock_user
+
+class TestInMemoryCatVotingDatabase(unittest.TestCase):
+    def setUp(self):
+        self.database = InMemoryCatVotingDatabase()
+        self.database.add_user(make_user(1))
+        self.cat_ids = []
+        for i in range(3):
+            image_id = self.database.save_photo(io.BytesIO(b'image%d' % i), f'cat{i}', 1)
+            self.database.insert_accepted_photo(image_id, f'cat{i}', 1)
+            self.cat_ids.append(image_id)
+
+    def test_save_and_get_photo(self):
+        self.assertEqual(self.database.get_photo(self.cat_ids[1]), b'image1')
+
+    def test_update_ratings(self):
+        winner, loser = self.cat_ids[0], self.cat_ids[1]
+        self.database.update_ratings(winner, loser)
+
+        self.assertGreater(self.database.get_rating(winner), DEFAULT_RATING)
+        self.assertLess(self.database.get_rating(loser), DEFAULT_RATING)
+        top = self.database.get_top_cats(1)[0]
+        self.assertEqual(top["_id"], winner)
+        self.assertEqual((top["wins"], top["losses"], top["total_votes"]), (1, 0, 1))
+
+    def test_update_ratings_unknown_cat(self):
+        self.database.update_ratings(self.cat_ids[0], 'missing')
+        self.assertEqual(self.database.get_rating(self.cat_ids[0]), DEFAULT_RATING)
+
+    def test_get_cats_for_voting(self):
+        cats = self.database.get_cats_for_voting()
+        self.assertEqual(len(cats), 2)
+        self.assertNotEqual(cats[0]["_id"], cats[1]["_id"])
+
+    def test_get_cats_for_voting_not_enough_cats(self):
+        self.assertEqual(InMemoryCatVotingDatabase().get_cats_for_voting(), [])
+
+    def test_get_user_photos_with_votes(self):
+        self.database.update_ratings(self.cat_ids[2], self.cat_ids[0])
+        photos = {p["photo_id"]: p for p in self.database.get_user_photos_with_votes(1)}
+
+        self.assertEqual(photos[self.cat_ids[2]]["rank"], 1)
+        self.assertEqual(photos[self.cat_ids[2]]["wins"], 1)
+        self.assertEqual(photos[self.cat_ids[0]]["rank"], 3)
+        self.assertEqual(photos[self.cat_ids[0]]["losses"], 1)
+        self.assertEqual(self.database.get_user_photos_with_votes(2), [])
+
+    def test_insert_declined_photo(self):
+        self.database.insert_declined_photo('declined1', 'bad', 1, 'No cat found')
+        self.assertEqual(self.database.declined['declined1']["reason"], 'No cat found')
+        self.assertEqual(self.database.users[1]["declined_photos"], ('declined1',))
+
+class TestInMemoryCatVotingDatabasePersistence(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.data_dir = self.tmp_dir.name
+
+    def populate(self, database):
+        database.add_user(make_user(1))
+        ids = []
+        for i in range(2):
+            image_id = database.save_photo(io.BytesIO(b'image%d' % i), f'cat{i}', 1)
+            database.insert_accepted_photo(image_id, f'cat{i}', 1)
+            ids.append(image_id)
+        database.update_ratings(ids[0], ids[1])
+        return ids
+
+    def assert_restored(self, ids, expected_rating):
+        restored = InMemoryCatVotingDatabase(self.data_dir)
+        self.assertEqual(restored.get_rating(ids[0]), expected_rating)
+        self.assertEqual(restored.get_top_cats(1)[0]["wins"], 1)
+        self.assertEqual(list(restored.users[1]["accepted_photos"]), ids)
+        self.assertEqual(restored.get_photo(ids[1]), b'image1')
+        restored.close()
+
+    def test_restore_from_journal(self):
+        database = InMemoryCatVotingDatabase(self.data_dir, snapshot_interval=1000)
+        ids = self.populate(database)
+        # No snapshot was taken, so the state must come back from the journal alone
+        self.assert_restored(ids, database.get_rating(ids[0]))
+
+    def test_restore_from_snapshot_and_journal(self):
+        database = InMemoryCatVotingDatabase(self.data_dir, snapshot_interval=2)
+        ids = self.populate(database)
+        database._snapshot_thread.join()
+        self.assertTrue(os.path.exists(os.path.join(self.data_dir, SNAPSHOT_FILENAME)))
+        self.assertFalse(os.path.exists(os.path.join(self.data_dir, ROTATED_JOURNAL_FILENAME)))
+        self.assert_restored(ids, database.get_rating(ids[0]))
+
+    def test_restore_after_interrupted_snapshot(self):
+        database = InMemoryCatVotingDatabase(self.data_dir, snapshot_interval=2)
+        with patch.object(database, '_write_snapshot'):
+            ids = self.populate(database)
+        # The snapshot never reached the disk, so its entries must come from the rotated journal
+        self.assertFalse(os.path.exists(os.path.join(self.data_dir, SNAPSHOT_FILENAME)))
+        self.assertTrue(os.path.exists(os.path.join(self.data_dir, ROTATED_JOURNAL_FILENAME)))
+        self.assert_restored(ids, database.get_rating(ids[0]))
+
+    def test_snapshot_is_not_affected_by_later_votes(self):
+        database = InMemoryCatVotingDatabase(self.data_dir)
+        ids = self.populate(database)
+        rating = database.get_rating(ids[0])
+        with patch.object(database, '_write_snapshot') as write_snapshot:
+            database.snapshot()
+            database.update_ratings(ids[0], ids[1])
+            database.add_user(make_user(1))
+        state = write_snapshot.call_args.args[0]
+        self.assertEqual(state["ratings"][0], rating)
+        self.assertEqual(state["wins"][0], 1)
+        self.assertEqual(list(state["users"][1]["accepted_photos"]), ids)
+
+    def test_restore_ignores_torn_journal_entry(self):
+        database = InMemoryCatVotingDatabase(self.data_dir)
+        ids = self.populate(database)
+        rating = database.get_rating(ids[0])
+        database._journal.write('{"op": "update_win')
+        database._journal.flush()
+        self.assert_restored(ids, rating)
+
+    def test_close_compacts_journal(self):
+        database = InMemoryCatVotingDatabase(self.data_dir)
+        ids = self.populate(database)
+        database.close()
+        self.assertEqual(os.path.getsize(os.path.join(self.data_dir, JOURNAL_FILENAME)), 0)
+        self.assert_restored(ids, database.get_rating(ids[0]))
+
+if __name__ == '__main__':
+    unittest.main()
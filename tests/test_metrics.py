@@ -0,0 +1,144 @@
+import asyncio
+import io
+import threading
+import unittest
+import urllib.request
+from unittest.mock import MagicMock
+from botocore.exceptions import ClientError
+from db import InMemoryCatVotingDatabase
+from metrics import MetricsRegistry, instrument_database, instrument_handlers, instrument_moderation, start_metrics_server
+from moderation import AmazonRekognitionModerationService
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_render_counter_and_histogram(self):
+        registry = MetricsRegistry()
+        registry.counter("requests", "Requests.", ("path",)).labels("/a").inc(2)
+        histogram = registry.histogram("latency_seconds", "Latency.", ("handler",), buckets=(0.1, 1.0))
+        histogram.labels("vote").observe(0.05)
+        histogram.labels("vote").observe(0.5)
+        histogram.labels("vote").observe(5)
+
+        text = registry.render()
+
+        self.assertIn("# TYPE requests counter", text)
+        self.assertIn('requests_total{path="/a"} 2', text)
+        self.assertIn('latency_seconds_bucket{handler="vote",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{handler="vote",le="1.0"} 2', text)
+        self.assertIn('latency_seconds_bucket{handler="vote",le="+Inf"} 3', text)
+        self.assertIn('latency_seconds_count{handler="vote"} 3', text)
+
+    def test_updates_from_threads_are_not_lost(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("calls", "Calls.", ("operation",))
+        histogram = registry.histogram("latency_seconds", "Latency.", ("operation",), buckets=(0.1,))
+
+        def work():
+            for _ in range(20000):
+                counter.labels("detect_labels").inc()
+                histogram.labels("detect_labels").observe(0.05)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        text = registry.render()
+        self.assertIn('calls_total{operation="detect_labels"} 80000', text)
+        self.assertIn('latency_seconds_bucket{operation="detect_labels",le="0.1"} 80000', text)
+        self.assertIn('latency_seconds_count{operation="detect_labels"} 80000', text)
+
+    def test_register_same_name_returns_existing_family(self):
+        registry = MetricsRegistry()
+        self.assertIs(registry.counter("calls", "Calls."), registry.counter("calls", "Calls."))
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_instrument_database(self):
+        database = InMemoryCatVotingDatabase()
+        instrument_database(database, self.registry)
+        ids = []
+        for i in range(2):
+            ids.append(database.save_photo(io.BytesIO(b'cat%d' % i), 'cat', 1))
+            database.insert_accepted_photo(ids[-1], 'cat', 1)
+        database.update_ratings(ids[0], ids[1])
+        database.get_photo(ids[0])
+
+        text = self.registry.render()
+        self.assertIn('cat_contest_db_seconds_count{method="update_ratings"} 1', text)
+        self.assertIn('cat_contest_db_seconds_count{method="update_winner"} 1', text)
+        self.assertIn('cat_contest_db_seconds_count{method="insert_accepted_photo"} 2', text)
+        self.assertIn('cat_contest_photo_read_bytes_total{store="InMemoryBlobStore"} 4', text)
+
+    def test_instrument_handlers(self):
+        contest = MagicMock()
+
+        async def vote(update, context):
+            return "voted"
+
+        async def photo_handler(update, context):
+            raise ValueError("bad photo")
+
+        contest.vote = vote
+        contest.photo_handler = photo_handler
+        instrument_handlers(contest, self.registry, handlers=("vote", "photo_handler"))
+
+        self.assertEqual(asyncio.run(contest.vote(None, None)), "voted")
+        with self.assertRaises(ValueError):
+            asyncio.run(contest.photo_handler(None, None))
+
+        text = self.registry.render()
+        self.assertIn('cat_contest_handler_seconds_count{handler="vote"} 1', text)
+        self.assertIn('cat_contest_handler_seconds_count{handler="photo_handler"} 1', text)
+        self.assertIn('cat_contest_handler_errors_total{handler="photo_handler"} 1', text)
+
+    def make_moderation_service(self):
+        service = AmazonRekognitionModerationService('key', 'secret', 'us-east-1')
+        client = MagicMock()
+        client.detect_moderation_labels.return_value = {'ModerationLabels': []}
+        client.detect_labels.return_value = {'Labels': [{'Name': 'Cat', 'Confidence': 99}]}
+        service._create_client = MagicMock(return_value=client)
+        return service, client
+
+    def test_instrument_moderation(self):
+        service, _ = self.make_moderation_service()
+        instrument_moderation(service, self.registry, cost_per_call=0.5)
+
+        self.assertTrue(service._contains_cat(b'image'))
+        service._contains_cat(b'image')
+
+        text = self.registry.render()
+        self.assertIn('cat_contest_rekognition_seconds_count{operation="detect_labels"} 2', text)
+        self.assertIn('cat_contest_rekognition_cost_usd_total{operation="detect_labels"} 1.0', text)
+
+    def test_instrument_moderation_counts_client_errors(self):
+        service, client = self.make_moderation_service()
+        client.detect_moderation_labels.side_effect = ClientError({'Error': {'Code': 'ThrottlingException'}},
+                                                                  'DetectModerationLabels')
+        service.warm_up()
+        instrument_moderation(service, self.registry, cost_per_call=0.5)
+
+        # The service logs the error and carries on, but the failed call is still counted
+        self.assertFalse(service._contains_inappropriate_content(b'image'))
+
+        text = self.registry.render()
+        self.assertIn('cat_contest_rekognition_errors_total{operation="detect_moderation_labels"} 1', text)
+        self.assertIn('cat_contest_rekognition_seconds_count{operation="detect_moderation_labels"} 1', text)
+        self.assertIn('cat_contest_rekognition_cost_usd_total{operation="detect_moderation_labels"} 0\n', text)
+
+    def test_metrics_server(self):
+        self.registry.counter("calls", "Calls.").labels().inc()
+        server = start_metrics_server(self.registry, 0)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode("utf-8")
+
+        self.assertIn("calls_total 1", body)
+
+if __name__ == '__main__':
+    unittest.main()
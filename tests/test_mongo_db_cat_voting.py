@@ -1,12 +1,14 @@
 import unittest
 from unittest.mock import patch, MagicMock
 from pymongo import errors
+from bson import ObjectId
 from db import MongoCatVotingDatabase
 
 class TestAddCatMethod(unittest.TestCase):
     @patch('db.mongo_database.MongoClient')
-    @patch('db.mongo_database.gridfs.GridFS')
+    @patch('storage.gridfs_blob_store.gridfs.GridFS')
     def setUp(self, mock_gridfs, mock_mongo_client):
+        self.mock_mongo_client = mock_mongo_client
         self.mock_client = mock_mongo_client.return_value
         self.mock_db = self.mock_client.__getitem__.return_value
         self.mock_user_collection = self.mock_db['user_info']
@@ -110,6 +112,55 @@ class TestAddCatMethod(unittest.TestCase):
         # Check the result
         self.assertEqual(result, [])
 
+    def test_get_top_cats_success(self):
+        mock_cats = [{"_id": "cat1", "rating": 1500}, {"_id": "cat2", "rating": 1450}]
+        self.mock_cat_collection.find.return_value.sort.return_value.limit.return_value = mock_cats
+
+        result = self.database.get_top_cats(2)
+
+        self.mock_cat_collection.find.return_value.sort.assert_called_once_with("rating", -1)
+        self.mock_cat_collection.find.return_value.sort.return_value.limit.assert_called_once_with(2)
+        self.assertEqual(result, mock_cats)
+
+    @patch('db.mongo_database.logging.error')
+    def test_get_top_cats_failure(self, mock_logging_error):
+        self.mock_cat_collection.find.side_effect = errors.PyMongoError('Error')
+
+        result = self.database.get_top_cats(3)
+
+        mock_logging_error.assert_called_once_with("Error fetching top cats: Error")
+        self.assertEqual(result, [])
+
+    def test_client_connects_lazily(self):
+        _, kwargs = self.mock_mongo_client.call_args
+        self.assertFalse(kwargs['connect'])
+        self.assertEqual(kwargs['maxPoolSize'], 100)
+
+    def test_warm_up_creates_indexes(self):
+        self.database.warm_up()
+
+        self.mock_cat_collection.create_index.assert_any_call([("total_votes", 1)])
+        self.mock_cat_collection.create_index.assert_any_call([("rating", -1)])
+
+    @patch('db.mongo_database.logging.error')
+    def test_warm_up_failure(self, mock_logging_error):
+        self.mock_cat_collection.create_index.side_effect = errors.PyMongoError('Error')
+
+        self.database.warm_up()
+
+        mock_logging_error.assert_called_once_with("Error warming up MongoDB: Error")
+
+    def test_save_and_get_photo(self):
+        self.mock_fs.put.side_effect = lambda data, _id, **kwargs: _id
+        self.mock_fs.get.return_value.read.return_value = b'image'
+
+        image_id = self.database.save_photo(b'image', 'cat1', 'test_user_id')
+
+        self.assertIsInstance(image_id, ObjectId)
+        self.mock_fs.put.assert_called_once_with(b'image', _id=image_id, filename='cat1', user_id='test_user_id')
+        self.assertEqual(self.database.get_photo(image_id), b'image')
+        self.mock_fs.get.assert_called_once_with(image_id)
+
     @patch('db.mongo_database.MongoCatVotingDatabase._get_user_photos')
     @patch('db.mongo_database.MongoCatVotingDatabase._get_photos_details')
     def test_get_user_photos_with_votes_success(self, mock_get_photos_details, mock_get_user_photos):
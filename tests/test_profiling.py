@@ -0,0 +1,115 @@
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+from profiling import HandlerProfiler, ProfilingSession
+from storage import InMemoryBlobStore
+
+class FakeContest:
+    def __init__(self):
+        self.db = MagicMock()
+        self.db.blob_store = InMemoryBlobStore()
+        self.db.blob_store.put('photo1', b'cat', 'cat.jpg', 1)
+
+    def preprocess_image(self, image_path):
+        return [bytearray(1024) for _ in range(100)]
+
+    def fill_cache(self):
+        self.cache = bytearray(2_000_000)
+
+    def busy_handler(self, seconds):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            self.preprocess_image('cat.jpg')
+            self.db.blob_store.get('photo1')
+
+class TestProfilingSession(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.contest = FakeContest()
+
+    def test_session_writes_reports_and_restores_methods(self):
+        session = ProfilingSession(self.contest, self.tmp_dir.name, seconds=0.3, sample_interval=0.001)
+        session.start()
+        self.assertIn('preprocess_image', vars(self.contest))
+        self.contest.busy_handler(0.2)
+        session.join()
+
+        self.assertNotIn('preprocess_image', vars(self.contest))
+        self.assertNotIn('get', vars(self.contest.db.blob_store))
+        with open(session.stacks_path) as f:
+            stacks = f.read().splitlines()
+        self.assertTrue(stacks)
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in stacks))
+        self.assertTrue(any('busy_handler' in line for line in stacks))
+        with open(session.allocations_path) as f:
+            report = f.read()
+        self.assertIn('preprocess_image:', report)
+        self.assertIn('InMemoryBlobStore.get:', report)
+
+    def test_snapshots_only_at_window_edges_and_first_calls(self):
+        session = ProfilingSession(self.contest, self.tmp_dir.name, seconds=0.3, sample_interval=0.01)
+        with patch('profiling.profiler.tracemalloc.take_snapshot', wraps=tracemalloc.take_snapshot) as take_snapshot:
+            session.start()
+            for _ in range(5):
+                self.contest.preprocess_image('cat.jpg')
+                self.contest.db.blob_store.get('photo1')
+            session.join()
+
+        self.assertEqual(session.calls['preprocess_image'], 5)
+        # Start and end of the window, plus a pair around the first call of each wrapped method
+        self.assertEqual(take_snapshot.call_count, 6)
+        with open(session.allocations_path) as f:
+            self.assertIn('test_profiling.py', f.read())
+
+    def test_first_call_report_only_covers_that_call(self):
+        session = ProfilingSession(self.contest, self.tmp_dir.name, seconds=0.05, sample_interval=0.01)
+        session.start()
+        self.contest.fill_cache()
+        images = self.contest.preprocess_image('cat.jpg')
+        session.join()
+
+        with open(session.allocations_path) as f:
+            report = f.read()
+        section = report.split('preprocess_image:', 1)[1].split('\n\n', 1)[0]
+        sizes = [int(line.split()[0]) for line in section.splitlines()[2:]]
+        self.assertTrue(sizes)
+        # The 2 MB cache filled before the call is not attributed to it
+        self.assertLess(sum(sizes), 1_000_000)
+        self.assertGreaterEqual(sum(sizes), 100 * 1024)
+        self.assertEqual(len(images), 100)
+
+class TestHandlerProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.profiler = HandlerProfiler(FakeContest(), self.tmp_dir.name, admin_ids=[42], default_seconds=0.05)
+
+    def make_update(self, user_id):
+        update = MagicMock()
+        update.message.from_user.id = user_id
+        update.message.reply_text = AsyncMock()
+        return update
+
+    def test_profile_command_ignores_non_admins(self):
+        update = self.make_update(7)
+        asyncio.run(self.profiler.profile_command(update, MagicMock(args=[])))
+
+        self.assertIsNone(self.profiler.session)
+        update.message.reply_text.assert_not_called()
+
+    def test_profile_command_starts_session(self):
+        update = self.make_update(42)
+        asyncio.run(self.profiler.profile_command(update, MagicMock(args=['0.05'])))
+        self.profiler.session.join()
+
+        self.assertEqual(self.profiler.session.seconds, 0.05)
+        self.assertTrue(os.path.exists(self.profiler.session.allocations_path))
+        update.message.reply_text.assert_awaited_once()
+
+if __name__ == '__main__':
+    unittest.main()
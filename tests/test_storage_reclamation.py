@@ -0,0 +1,107 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+from bson import ObjectId
+from pymongo import errors
+from db import MongoStorageReclaimer
+from storage import InMemoryBlobStore
+
+def object_id_days_ago(days):
+    return ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(days=days))
+
+def find_existing(ids):
+    """Fake collection.find that returns documents for the ids that exist."""
+    def find(query, projection=None, **kwargs):
+        return [{"_id": i} for i in query["_id"]["$in"] if i in ids]
+    return find
+
+class TestMongoStorageReclaimer(unittest.TestCase):
+    def setUp(self):
+        self.database = MagicMock()
+        self.database.blob_store = InMemoryBlobStore()
+
+        self.accepted_id = object_id_days_ago(50)
+        self.old_declined_id = object_id_days_ago(40)
+        self.orphan_id = object_id_days_ago(2)
+        self.fresh_orphan_id = ObjectId()
+        for blob_id, data in [(self.accepted_id, b'cat'), (self.old_declined_id, b'declined'),
+                              (self.orphan_id, b'orphan'), (self.fresh_orphan_id, b'uploading')]:
+            self.database.blob_store.put(blob_id, data, 'photo.jpg', 1)
+
+        self.database.declined_collection.find.side_effect = self.find_declined
+        self.database.cat_collection.find.side_effect = find_existing({self.accepted_id})
+        self.reclaimer = MongoStorageReclaimer(self.database, declined_retention_days=30,
+                                               batch_size=2, max_deletes_per_second=0)
+
+    def find_declined(self, query, projection=None, **kwargs):
+        if "$lt" in query["_id"]:
+            if self.old_declined_id < query["_id"]["$lt"]:
+                return [{"_id": self.old_declined_id, "user_id": 1}]
+            return []
+        return find_existing({self.old_declined_id})(query)
+
+    def test_dry_run_reports_without_deleting(self):
+        report = self.reclaimer.run_once(dry_run=True)
+
+        self.assertEqual(report["expired_declined"], 1)
+        self.assertEqual(report["orphans"], 1)
+        self.assertEqual(report["deleted"], 0)
+        self.assertEqual(report["bytes"], len(b'declined') + len(b'orphan'))
+        self.assertTrue(self.database.blob_store.exists(self.old_declined_id))
+        self.assertTrue(self.database.blob_store.exists(self.orphan_id))
+        self.database.declined_collection.delete_one.assert_not_called()
+
+    def test_run_once_deletes_expired_and_orphaned_photos(self):
+        report = self.reclaimer.run_once()
+
+        self.assertEqual(report["deleted"], 2)
+        store = self.database.blob_store
+        self.assertFalse(store.exists(self.old_declined_id))
+        self.assertFalse(store.exists(self.orphan_id))
+        self.assertTrue(store.exists(self.accepted_id))
+        self.assertTrue(store.exists(self.fresh_orphan_id))
+        self.database.declined_collection.delete_one.assert_called_once_with({"_id": self.old_declined_id})
+        self.database.user_collection.update_one.assert_called_once_with(
+            {"_id": 1}, {"$pull": {"declined_photos": self.old_declined_id}})
+
+    def test_string_blob_ids_are_matched_as_object_ids(self):
+        store = InMemoryBlobStore()
+        store.put(str(self.accepted_id), b'cat', 'photo.jpg', 1)
+        self.database.blob_store = store
+        self.reclaimer = MongoStorageReclaimer(self.database, declined_retention_days=None)
+
+        report = self.reclaimer.run_once(dry_run=True)
+
+        self.assertEqual(report["orphans"], 0)
+
+    def test_stop_ends_a_pass_early(self):
+        self.reclaimer._stop_event.set()
+
+        report = self.reclaimer.run_once()
+
+        self.assertEqual(report["deleted"], 0)
+        self.assertTrue(self.database.blob_store.exists(self.old_declined_id))
+        self.assertTrue(self.database.blob_store.exists(self.orphan_id))
+
+    def test_stop_interrupts_deletes(self):
+        delete = self.database.blob_store.delete
+
+        def delete_then_stop(blob_id):
+            delete(blob_id)
+            self.reclaimer._stop_event.set()
+
+        self.database.blob_store.delete = delete_then_stop
+        report = self.reclaimer.run_once()
+
+        self.assertEqual(report["deleted"], 1)
+        self.assertTrue(self.database.blob_store.exists(self.orphan_id))
+
+    def test_run_once_logs_database_errors(self):
+        self.database.declined_collection.find.side_effect = errors.PyMongoError('Error')
+
+        report = self.reclaimer.run_once()
+
+        self.assertEqual(report["deleted"], 0)
+
+if __name__ == '__main__':
+    unittest.main()